@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: catalog cold start, JSON path vs precompiled artifact.
+
+Runs two measurements:
+  1. Cold start - a fresh interpreter imports catalog.py and loads the
+     snapshot, once with CATALOG_ARTIFACT=False (parse + enrich the JSON)
+     and once with the artifact from `manage_products.py compile`.
+  2. In-process decode - parse_catalog() vs load_artifact() on the real
+     catalog and on a synthetic catalog scaled up to --scale products.
+
+Usage: python benchmarks/bench_catalog_load.py [--runs 20] [--scale 5000]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+sys.path.insert(0, str(SRC_DIR))
+
+from catalog import CATALOG_FILE, ProductCatalog, parse_catalog  # noqa: E402
+from catalog_artifact import dump_artifact, load_artifact  # noqa: E402
+
+COLD_START = (
+    "import sys, time; t = time.perf_counter(); sys.path.insert(0, {src!r}); "
+    "import catalog; catalog.ProductCatalog({json!r}, {artifact!r}).snapshot(); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def cold_start(json_path, artifact_path, runs):
+    """Median seconds for import + first snapshot in a fresh interpreter"""
+    code = COLD_START.format(src=str(SRC_DIR), json=json_path, artifact=artifact_path)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def best_of(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def scaled_catalog(raw, scale):
+    base = json.loads(raw)
+    items = [dict(base[i % len(base)], title=f"{base[i % len(base)]['title']} #{i}") for i in range(scale)]
+    return json.dumps(items, indent=4).encode('utf-8')
+
+
+def report(label, json_time, artifact_time):
+    speedup = json_time / artifact_time if artifact_time else float('inf')
+    print(f"{label:<40} json {json_time * 1000:8.3f} ms   artifact {artifact_time * 1000:8.3f} ms   {speedup:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--scale', type=int, default=5000)
+    args = parser.parse_args()
+
+    with open(CATALOG_FILE, 'rb') as f:
+        raw = f.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = [('real', raw), (f'scaled x{args.scale}', scaled_catalog(raw, args.scale))]
+        print(f"Cold start (median of {args.runs} fresh interpreters, import + first load)")
+        for name, data in cases:
+            json_path = os.path.join(tmp, f'{name.split()[0]}.json')
+            artifact_path = os.path.join(tmp, f'{name.split()[0]}.bin')
+            with open(json_path, 'wb') as f:
+                f.write(data)
+            with open(artifact_path, 'wb') as f:
+                f.write(dump_artifact(parse_catalog(data), hashlib.sha256(data).hexdigest()))
+
+            # Sanity check: both paths must produce the same catalog
+            from_json = ProductCatalog(json_path, None).products()
+            from_artifact = ProductCatalog(json_path, artifact_path).products()
+            assert from_json == from_artifact, 'artifact does not match JSON catalog'
+
+            report(f"  {name} ({len(from_json)} products)",
+                   cold_start(json_path, None, args.runs),
+                   cold_start(json_path, artifact_path, args.runs))
+
+        print(f"\nIn-process decode (best of {args.runs})")
+        for name, data in cases:
+            blob = dump_artifact(parse_catalog(data), hashlib.sha256(data).hexdigest())
+            report(f"  {name} ({len(data)} -> {len(blob)} bytes)",
+                   best_of(lambda: parse_catalog(data), args.runs),
+                   best_of(lambda: load_artifact(blob), args.runs))
+
+
+if __name__ == '__main__':
+    main()
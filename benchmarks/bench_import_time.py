@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start import-time budget.
+
+Starts fresh interpreters with `python -X importtime`, imports an entry
+module (src/app.py, or src/webhook_app.py with --entry webhook_app) and
+serves one request (default GET /qa, or a POST to /webhook) through the test
+client, against an empty temporary database and with the serverless settings
+from vercel.json (no background workers started with the app). Reports:
+
+  - median import time of the entry module and time to the first response
+  - where the import time goes, by top-level package (self time), and how
+    much of it is Flask itself
+  - modules that are supposed to load lazily (Stripe SDK, requests, SMTP and
+    email; for the webhook function also the catalog, search and page caches)
+    but were imported anyway, and whether the request opened the database
+
+Exits with status 1 if the median import exceeds --budget-ms, a lazy module
+was imported at start-up, or a catalog-only page (CATALOG_ONLY_PATHS, e.g. the
+default /qa) opened the database. Results are saved as JSON like bench_routes.py,
+and --baseline compares the import and first-response medians.
+
+Usage: python benchmarks/bench_import_time.py [--entry app|webhook_app]
+           [--runs 10] [--path /qa] [--budget-ms 400] [--output results.json]
+           [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / 'src'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+# Loaded on first use by the app; a cold start must not import them
+LAZY_MODULES = ('stripe', 'requests', 'smtplib', 'email.mime', 'dotenv', 'cProfile')
+
+# entry module -> (method, default path, request body, modules it must not import)
+ENTRIES = {
+    'app': ('GET', '/qa', None, LAZY_MODULES),
+    'webhook_app': ('POST', '/webhook', '{"id": "evt_coldstart", "type": "ping"}',
+                    LAZY_MODULES + ('catalog', 'search', 'render_cache', 'http_cache', 'cart_store',
+                                    'views.catalog', 'views.content')),
+}
+
+# As set for the serverless deploy in vercel.json
+SERVERLESS_ENV = {'WEBHOOK_AUTOSTART': 'False', 'EMAIL_AUTOSTART': 'False'}
+
+# Pages rendered from the catalog alone; serving them cold must not open SQLite
+CATALOG_ONLY_PATHS = ('/', '/qa', '/products', '/products/cards', '/api/products', '/api/products/search')
+
+CHILD = (
+    "import sys, time; sys.path.insert(0, {src!r}); t = time.perf_counter(); import {entry} as entry; "
+    "imported = time.perf_counter() - t; client = entry.app.test_client(); t = time.perf_counter(); "
+    "status = client.open({path!r}, method={method!r}, data={data!r}, content_type='application/json').status_code; "
+    "print(imported, time.perf_counter() - t, status)"
+)
+
+
+def parse_importtime(stderr, entry):
+    """[(depth, module, self_us, cumulative_us)] for the `import <entry>` subtree"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, module, int(self_us), int(cumulative_us)))
+
+    # Children are printed before their parent; the subtree ends at the top-level entry module
+    start = 0
+    for index, (depth, module, _, _) in enumerate(entries):
+        if depth == 0:
+            if module == entry:
+                return entries[start:index + 1]
+            start = index + 1
+    raise RuntimeError(f'`import {entry}` not found in -X importtime output')
+
+
+def cold_start(entry, method, path, data, env, cwd):
+    child = CHILD.format(src=str(SRC_DIR), entry=entry, method=method, path=path, data=data)
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', child],
+        capture_output=True, text=True, env=env, cwd=cwd
+    )
+    if out.returncode != 0:
+        raise RuntimeError(f'cold start failed:\n{out.stderr[-2000:]}')
+    imported, first_response, status = out.stdout.strip().splitlines()[-1].split()
+    return float(imported), float(first_response), int(status), parse_importtime(out.stderr, entry)
+
+
+def by_package(entries):
+    """Self time per top-level package, largest first"""
+    totals = defaultdict(int)
+    for _, module, self_us, _ in entries:
+        totals[module.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def lazy_imports(entries, lazy_modules):
+    return sorted({module for _, module, _, _ in entries
+                   if any(module == lazy or module.startswith(lazy + '.') for lazy in lazy_modules)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entry', choices=sorted(ENTRIES), default='app', help='entry module to import')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', help='route requested after the import (default per entry)')
+    parser.add_argument('--budget-ms', type=float, default=400, help='maximum median import time of the entry')
+    parser.add_argument('--top', type=int, default=15, help='packages to list')
+    parser.add_argument('--output', help='result file (default benchmarks/results/import-<time>.json)')
+    parser.add_argument('--baseline', help='earlier result file to compare against')
+    args = parser.parse_args()
+    method, default_path, data, lazy_modules = ENTRIES[args.entry]
+    args.path = args.path or default_path
+
+    imports, responses, trees = [], [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'cold.db')
+        env = {**os.environ, 'DATABASE_PATH': db_path, 'STRIPE_SECRET_KEY': 'sk_test_coldstart',
+               'LOG_LEVEL': 'WARNING', 'CATALOG_WATCH': 'False', **SERVERLESS_ENV}
+        for _ in range(args.runs):
+            imported, first_response, status, entries = cold_start(args.entry, method, args.path, data, env, tmp)
+            if status >= 400:
+                raise RuntimeError(f'{args.path} returned {status}')
+            imports.append(imported)
+            responses.append(first_response)
+            trees.append(entries)
+        database_opened = os.path.exists(db_path)
+
+    # Package breakdown from the run closest to the median
+    median_import = statistics.median(imports)
+    entries = trees[min(range(len(imports)), key=lambda i: abs(imports[i] - median_import))]
+    total_us = entries[-1][3]
+    flask_us = next((cumulative for _, module, _, cumulative in entries if module == 'flask'), 0)
+    packages = by_package(entries)
+    lazy = lazy_imports(entries, lazy_modules)
+    unexpected_db = database_opened and args.path.split('?')[0] in CATALOG_ONLY_PATHS
+
+    print(f"Cold start, median of {args.runs} fresh interpreters")
+    print(f"  import {args.entry:<15}{median_import * 1000:8.1f} ms   (budget {args.budget_ms:.0f} ms)")
+    print(f"  first {method} {args.path:<10} {statistics.median(responses) * 1000:8.1f} ms")
+    print(f"  flask (cumulative)    {flask_us / 1000:8.1f} ms   {flask_us / total_us:6.1%} of import")
+    print(f"  database opened       {'yes' if database_opened else 'no'}")
+    print(f"\nSelf time by package ({total_us / 1000:.1f} ms under `import {args.entry}`)")
+    for package, self_us in packages[:args.top]:
+        print(f"  {package:<24}{self_us / 1000:8.1f} ms {self_us / total_us:7.1%}")
+    if lazy:
+        print(f"\nLazily loaded modules imported at start-up: {', '.join(lazy)}")
+    if unexpected_db:
+        print(f"\n{args.path} only renders catalog content but opened the database")
+
+    results = {
+        'benchmark': 'import_time',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                     capture_output=True, text=True).stdout.strip() or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'entry': args.entry, 'runs': args.runs, 'method': method, 'path': args.path,
+                     'budget_ms': args.budget_ms},
+        'import_ms': round(median_import * 1000, 2),
+        'first_response_ms': round(statistics.median(responses) * 1000, 2),
+        'flask_ms': round(flask_us / 1000, 2),
+        'database_opened': database_opened,
+        'lazy_modules_imported': lazy,
+        'packages_ms': {package: round(self_us / 1000, 3) for package, self_us in packages},
+    }
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"import-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f"\nSaved {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst baseline {baseline.get('git_commit') or ''} ({baseline.get('timestamp')})")
+        for key in ('import_ms', 'first_response_ms', 'flask_ms'):
+            change = results[key] / baseline[key] - 1 if baseline.get(key) else 0.0
+            print(f"  {key:<20}{results[key]:8.1f} ms  base {baseline.get(key, 0):8.1f} ms  {change:+7.1%}")
+
+    if median_import * 1000 > args.budget_ms or lazy or unexpected_db:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
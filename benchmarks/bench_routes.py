@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Benchmark: storefront route latency and throughput.
+
+Drives the main routes (home, product list and detail, cart, checkout and
+the Stripe webhook) either in-process through Flask's test client or over
+HTTP against gunicorn workers. Every run gets a fresh temporary SQLite
+database and a local fake Stripe API (benchmarks/fake_stripe.py), so
+results do not depend on the network or on existing data. Webhook events
+are signed with a benchmark secret, so signature checking is measured too.
+
+For each route it prints and saves p50/p95/p99 latency and requests per
+second as JSON. Pass --baseline with an earlier result file to compare:
+the script exits with status 1 if any route's p95 got slower, or its
+throughput dropped, by more than --tolerance.
+
+Usage: python benchmarks/bench_routes.py [--mode inprocess|gunicorn]
+           [--requests 300] [--concurrency 1] [--routes home,checkout]
+           [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import fake_stripe
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / 'src'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+sys.path.insert(0, str(SRC_DIR))
+
+WEBHOOK_SECRET = 'whsec_benchmark'
+FIREBASE_USER = {'uid': 'bench-user', 'email': 'bench@example.com', 'displayName': 'Bench User'}
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# request(i) -> (method, path, body bytes or None, headers); setup(client) runs once per client
+Scenario = namedtuple('Scenario', 'name request setup')
+
+
+def get(path):
+    return lambda i: ('GET', path, None, None)
+
+
+def post_json(path, obj):
+    return 'POST', path, json.dumps(obj).encode(), JSON_HEADERS
+
+
+def add_one(product_id):
+    def setup(client):
+        client.request(*post_json('/cart/add', {'product_id': product_id, 'quantity': 1}))
+    return setup
+
+
+def signed_webhook(i):
+    """A checkout.session.completed event for one of the sessions checkout created"""
+    payload = json.dumps({
+        'id': f'evt_bench_{i}',
+        'type': 'checkout.session.completed',
+        'data': {'object': {'id': f'cs_bench_{i + 1}'}},
+    }).encode()
+    timestamp = int(time.time())
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+    return 'POST', '/webhook', payload, {**JSON_HEADERS, 'Stripe-Signature': f't={timestamp},v1={signature}'}
+
+
+def scenarios(products):
+    """The benchmarked routes, in run order (checkout before webhook, so events match orders)"""
+    first = products[0]
+    ids = [product['id'] for product in products]
+    return [
+        Scenario('home', get('/'), None),
+        Scenario('products', get('/products'), None),
+        Scenario('product_detail', lambda i: ('GET', f'/product/{ids[i % len(ids)]}', None, None), None),
+        Scenario('cart_view', get('/cart'), add_one(first['id'])),
+        Scenario('cart_count', get('/cart/count'), add_one(first['id'])),
+        Scenario('cart_add', lambda i: post_json('/cart/add', {'product_id': ids[i % len(ids)], 'quantity': 1}), None),
+        Scenario('cart_batch', lambda i: post_json('/api/cart/batch', {'operations': [
+            {'op': 'add', 'product_id': ids[i % len(ids)], 'quantity': 2},
+            {'op': 'update', 'product_id': ids[i % len(ids)], 'quantity': 1},
+        ]}), None),
+        Scenario('checkout', lambda i: post_json('/create-checkout-session', {
+            'firebase_user': FIREBASE_USER,
+            'product_id': ids[i % len(ids)],
+            'name': products[i % len(ids)]['title'],
+            'price': products[i % len(ids)]['price'],
+        }), None),
+        Scenario('webhook', signed_webhook, None),
+    ]
+
+
+class InProcessClient:
+    """Flask test client with its own cookie jar"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, data=body, headers=headers)
+        response.get_data()
+        return response.status_code
+
+
+class HTTPClient:
+    """Keep-alive requests.Session against a running server"""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.session.request(method, self.base_url + path, data=body, headers=headers, timeout=30)
+        response.content
+        return response.status_code
+
+
+def percentile(sorted_samples, pct):
+    if len(sorted_samples) == 1:
+        return sorted_samples[0]
+    return statistics.quantiles(sorted_samples, n=100, method='inclusive')[pct - 1]
+
+
+def run_scenario(make_client, scenario, requests, concurrency, warmup, counter):
+    """Send `requests` requests from `concurrency` clients; returns the route's summary"""
+    clients = [make_client() for _ in range(concurrency)]
+    for client in clients:
+        if scenario.setup:
+            scenario.setup(client)
+        for _ in range(warmup):
+            client.request(*scenario.request(next(counter)))
+
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(client, count):
+        nonlocal errors
+        samples = []
+        failed = 0
+        for _ in range(count):
+            request = scenario.request(next(counter))
+            start = time.perf_counter()
+            try:
+                status = client.request(*request)
+            except Exception:
+                status = 599
+            samples.append(time.perf_counter() - start)
+            if status >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(samples)
+            errors += failed
+
+    shares = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(client, share)) for client, share in zip(clients, shares)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'rps': round(len(latencies) / wall, 1),
+    }
+
+
+def run_all(make_client, selected, args):
+    counters = {}
+    results = {}
+    print(f"{'route':<16}{'reqs':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}")
+    for scenario in selected:
+        counter = counters.setdefault(scenario.name, itertools.count())
+        summary = run_scenario(make_client, scenario, args.requests, args.concurrency, args.warmup, counter)
+        results[scenario.name] = summary
+        print(f"{scenario.name:<16}{summary['requests']:>7}{summary['errors']:>8}{summary['p50_ms']:>10.2f}"
+              f"{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}{summary['rps']:>10.1f}")
+    return results
+
+
+def benchmark_env(db_path, api_base):
+    return {
+        'DATABASE_PATH': db_path,
+        'STRIPE_SECRET_KEY': 'sk_test_benchmark',
+        'STRIPE_PUBLISHABLE_KEY': 'pk_test_benchmark',
+        'STRIPE_WEBHOOK_SECRET': WEBHOOK_SECRET,
+        'STRIPE_API_BASE': api_base,
+        'STRIPE_MAX_NETWORK_RETRIES': '0',
+        'FLASK_SECRET_KEY': 'benchmark',
+        'LOG_LEVEL': 'ERROR',
+        'CATALOG_WATCH': 'False',
+    }
+
+
+def run_inprocess(selected, args):
+    import app as storefront
+    storefront.app.config['TESTING'] = True
+    return run_all(lambda: InProcessClient(storefront.app), selected, args)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_ready(base_url, proc, timeout=30):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {proc.returncode}')
+        try:
+            requests.get(base_url + '/cart/count', timeout=5)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start in time')
+
+
+def run_gunicorn(selected, args):
+    from migrations import migrate
+    migrate(os.environ['DATABASE_PATH'])  # once, before the workers start
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    cmd = [
+        sys.executable, '-m', 'gunicorn', '--chdir', str(SRC_DIR),
+        '--workers', str(args.workers), '--worker-class', 'gthread', '--threads', str(args.threads),
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app',
+    ]
+    proc = subprocess.Popen(cmd, env=dict(os.environ))
+    try:
+        wait_until_ready(base_url, proc)
+        return run_all(lambda: HTTPClient(base_url), selected, args)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against a baseline run; returns the names of regressed routes"""
+    if baseline.get('mode') != results['mode']:
+        print(f"\nWarning: baseline mode is {baseline.get('mode')!r}, this run is {results['mode']!r}")
+    print(f"\nAgainst baseline {baseline.get('git_commit') or ''} ({baseline.get('timestamp')}), "
+          f"tolerance {tolerance:.0%}")
+    print(f"{'route':<16}{'p95 ms':>10}{'base':>10}{'change':>9}{'rps':>10}{'base':>10}{'change':>9}")
+    regressed = []
+    for name, current in results['routes'].items():
+        base = baseline.get('routes', {}).get(name)
+        if not base:
+            continue
+        p95_change = current['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+        rps_change = current['rps'] / base['rps'] - 1 if base['rps'] else 0.0
+        flag = ''
+        if p95_change > tolerance or rps_change < -tolerance:
+            regressed.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<16}{current['p95_ms']:>10.2f}{base['p95_ms']:>10.2f}{p95_change:>+9.1%}"
+              f"{current['rps']:>10.1f}{base['rps']:>10.1f}{rps_change:>+9.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn'), default='inprocess')
+    parser.add_argument('--requests', type=int, default=300, help='measured requests per route')
+    parser.add_argument('--concurrency', type=int, default=1, help='concurrent clients per route')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per client first')
+    parser.add_argument('--routes', help='comma-separated subset of routes to run')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='threads per gunicorn worker')
+    parser.add_argument('--stripe-latency-ms', type=float, default=0, help='simulated Stripe API round trip')
+    parser.add_argument('--output', help='result file (default benchmarks/results/routes-<mode>-<time>.json)')
+    parser.add_argument('--baseline', help='earlier result file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed p95/rps regression (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    server, api_base = fake_stripe.start(latency_ms=args.stripe_latency_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Before any app module is imported: they read their settings at import
+        os.environ.update(benchmark_env(os.path.join(tmp, 'bench.db'), api_base))
+
+        from catalog import catalog
+        selected = scenarios(catalog.products())
+        if args.routes:
+            wanted = set(args.routes.split(','))
+            unknown = wanted - {scenario.name for scenario in selected}
+            if unknown:
+                parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+            selected = [scenario for scenario in selected if scenario.name in wanted]
+
+        print(f"Benchmarking {len(selected)} routes {args.mode}: {args.requests} requests each, "
+              f"concurrency {args.concurrency}\n")
+        if args.mode == 'gunicorn':
+            routes = run_gunicorn(selected, args)
+        else:
+            routes = run_inprocess(selected, args)
+    server.shutdown()
+
+    results = {
+        'benchmark': 'routes',
+        'mode': args.mode,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'workers': args.workers if args.mode == 'gunicorn' else None,
+            'threads': args.threads if args.mode == 'gunicorn' else None,
+            'stripe_latency_ms': args.stripe_latency_ms,
+        },
+        'routes': routes,
+    }
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"routes-{args.mode}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f"\nSaved {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
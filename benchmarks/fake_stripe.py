@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Minimal local stand-in for the Stripe API, for benchmarks.
+
+Answers the calls the storefront makes (Product, Price and Checkout
+Session creation) with canned objects and per-type sequential ids
+(cs_bench_1, cs_bench_2, ...), so checkout can be load-tested without
+network access or a Stripe account. An optional --latency-ms delay
+approximates a real round trip.
+
+Point the app at it with STRIPE_API_BASE=http://127.0.0.1:<port>.
+
+Usage: python benchmarks/fake_stripe.py [--port 12111] [--latency-ms 0]
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+OBJECTS = {
+    '/v1/products': ('prod_bench', 'product'),
+    '/v1/prices': ('price_bench', 'price'),
+    '/v1/checkout/sessions': ('cs_bench', 'checkout.session'),
+}
+
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        prefix, kind = OBJECTS.get(self.path, ('obj_bench', 'unknown'))
+        obj = {'id': f'{prefix}_{next(self.server.ids[prefix])}', 'object': kind}
+        if kind == 'checkout.session':
+            obj['url'] = f"https://checkout.stripe.test/{obj['id']}"
+        self._send(200, obj)
+
+    def do_GET(self):
+        self._send(404, {'error': {'type': 'invalid_request_error', 'message': f'No such resource: {self.path}'}})
+
+    def _send(self, status, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=0, latency_ms=0):
+    """Serve in a daemon thread; returns (server, api_base)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeStripeHandler)
+    server.daemon_threads = True
+    server.ids = defaultdict(lambda: itertools.count(1))  # separate sequence per object type
+    server.latency = latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=12111)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    server, api_base = start(args.port, args.latency_ms)
+    print(f"Fake Stripe API listening on {api_base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,9 +6,24 @@ Easy way to add, view, and manage products from command line
 
 import json
 import os
+import sys
 from pathlib import Path
 
-PRODUCTS_FILE = Path(__file__).parent / 'backend' / 'data' / 'extracted_products.json'
+SRC_DIR = Path(__file__).parent / 'src'
+PRODUCTS_FILE = SRC_DIR / 'data' / 'extracted_products.json'
+ARTIFACT_FILE = SRC_DIR / 'data' / 'catalog.bin'
+
+# Share the catalog code with the app
+sys.path.insert(0, str(SRC_DIR))
+
+def get_store():
+    """SQLite catalog store when CATALOG_BACKEND=sqlite, otherwise None (JSON file)"""
+    if os.getenv('CATALOG_BACKEND', 'json') != 'sqlite':
+        return None
+    from catalog_store import SQLiteCatalogStore
+    store = SQLiteCatalogStore(os.getenv('CATALOG_DATABASE', 'fondant_shop.db'))
+    store.ensure_schema()
+    return store
 
 def load_products():
     """Load products from JSON file"""
@@ -26,9 +41,26 @@ def save_products(products):
             with open(backup_file, 'w') as bf:
                 bf.write(f.read())
     
-    with open(PRODUCTS_FILE, 'w') as f:
+    # Write to a temp file and rename so running workers never see a partial file
+    tmp_file = PRODUCTS_FILE.with_suffix('.json.tmp')
+    with open(tmp_file, 'w') as f:
         json.dump(products, f, indent=4)
+    os.replace(tmp_file, PRODUCTS_FILE)
     print(f"✅ Products saved successfully!")
+    compile_catalog()
+
+def compile_catalog():
+    """Build the precompiled catalog artifact loaded by the app at startup"""
+    from catalog import compile_catalog as build_artifact
+    
+    try:
+        count = build_artifact(str(PRODUCTS_FILE), str(ARTIFACT_FILE))
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not compile catalog: {e}")
+        return False
+    size = ARTIFACT_FILE.stat().st_size
+    print(f"✅ Compiled {count} products into {ARTIFACT_FILE.name} ({size} bytes)")
+    return True
 
 def add_product():
     """Add a new product"""
@@ -51,6 +83,13 @@ def add_product():
         print("❌ Invalid price format!")
         return
     
+    store = get_store()
+    if store:
+        from catalog import price_to_cents
+        product_id = store.add_product(title, price, link, image_url, price_to_cents(price))
+        print(f"✅ Product '{title}' added with id {product_id}!")
+        return
+    
     products = load_products()
     new_product = {
         "title": title,
@@ -65,7 +104,8 @@ def add_product():
 
 def view_products():
     """View all products"""
-    products = load_products()
+    store = get_store()
+    products = store.load_products() if store else load_products()
     
     if not products:
         print("\n❌ No products found!")
@@ -76,7 +116,9 @@ def view_products():
     print("="*50)
     
     for i, product in enumerate(products, 1):
-        print(f"\n{i}. {product['title']}")
+        # SQLite products are listed (and deleted) by their stable id
+        number = product['id'] if store else i
+        print(f"\n{number}. {product['title']}")
         print(f"   Price: ${product['price']}")
         print(f"   Link: {product['link'][:50]}...")
         print(f"   Image: {product['image_url'][:50]}...")
@@ -95,7 +137,8 @@ def bulk_add_from_csv():
         return
     
     import csv
-    products = load_products()
+    store = get_store()
+    products = [] if store else load_products()
     added = 0
     
     with open(csv_file, 'r', encoding='utf-8') as f:
@@ -110,11 +153,35 @@ def bulk_add_from_csv():
                 })
                 added += 1
     
-    save_products(products)
+    if store:
+        from catalog import price_to_cents
+        for product in products:
+            product['price_cents'] = price_to_cents(product['price'])
+        store.import_products(products)
+    else:
+        save_products(products)
     print(f"✅ Added {added} products from CSV!")
 
 def delete_product():
     """Delete a product"""
+    store = get_store()
+    if store:
+        view_products()
+        # Ids start at 0, so an empty answer (not 0) cancels
+        answer = input("\nEnter product id to delete (or press Enter to cancel): ").strip()
+        if not answer:
+            return
+        try:
+            product_id = int(answer)
+        except ValueError:
+            print("❌ Please enter a valid number!")
+            return
+        if store.delete_product(product_id):
+            print(f"✅ Deleted product {product_id}")
+        else:
+            print("❌ Invalid product id!")
+        return
+    
     products = load_products()
     
     if not products:
@@ -138,6 +205,102 @@ def delete_product():
     except ValueError:
         print("❌ Please enter a valid number!")
 
+def search_products():
+    """Search product titles"""
+    query = input("Search for: ").strip()
+    if not query:
+        return
+    
+    store = get_store()
+    if store:
+        results = store.search(query)
+    else:
+        from catalog import CatalogSnapshot, parse_catalog
+        from search import SearchIndex
+        with open(PRODUCTS_FILE, 'rb') as f:
+            snapshot = CatalogSnapshot(parse_catalog(f.read()))
+        results = [snapshot.get(pid) for pid in SearchIndex.build(snapshot).search(query)]
+    
+    if not results:
+        print("\n❌ No matching products!")
+        return
+    for product in results:
+        print(f"{product['id']}. {product['title']} - ${product['price']}")
+
+def import_to_sqlite():
+    """Copy the JSON catalog into the SQLite store, keeping list positions as ids"""
+    from catalog import parse_catalog
+    from catalog_store import SQLiteCatalogStore
+    
+    with open(PRODUCTS_FILE, 'rb') as f:
+        products = parse_catalog(f.read())
+    db_path = os.getenv('CATALOG_DATABASE', 'fondant_shop.db')
+    store = SQLiteCatalogStore(db_path)
+    store.ensure_schema()
+    count = store.import_products(products)
+    print(f"✅ Imported {count} products into {db_path}")
+    return True
+
+def sync_stripe():
+    """Create Stripe Products/Prices for every catalog product and variant"""
+    from catalog import catalog
+    from db import pool
+    from migrations import migrate
+    from stripe_prices import configure_stripe, stripe_api, stripe_prices
+    
+    api_key = os.getenv('STRIPE_SECRET_KEY', '').strip().strip("'").strip('"')
+    if not api_key:
+        print("❌ STRIPE_SECRET_KEY is not set!")
+        return False
+    configure_stripe(api_key)
+    stripe = stripe_api()
+    migrate(pool.path)
+    
+    try:
+        count = stripe_prices.sync_catalog(catalog.products(), lambda p: p['variants'])
+    except stripe.error.StripeError as e:
+        print(f"❌ Stripe sync failed: {e}")
+        return False
+    print(f"✅ {count} Stripe prices cached in {pool.path}")
+    return True
+
+def export_data(args):
+    """Stream orders or reviews from the shop database to stdout or a file"""
+    import argparse
+    import sqlite3
+    from exports import EXPORT_FORMATS, export_chunks, parse_since
+    
+    parser = argparse.ArgumentParser(prog='manage_products.py export')
+    parser.add_argument('kind', choices=['orders', 'reviews'])
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--since', help='only rows created at or after this ISO date/datetime')
+    parser.add_argument('--output', '-o', help='file to write (default: stdout)')
+    parser.add_argument('--database', default=os.getenv('DATABASE_PATH', 'fondant_shop.db'))
+    options = parser.parse_args(args)
+    
+    try:
+        since = parse_since(options.since)
+    except ValueError:
+        print(f"❌ Invalid --since date: {options.since}", file=sys.stderr)
+        return False
+    
+    db = sqlite3.connect(options.database)
+    db.row_factory = sqlite3.Row
+    out = open(options.output, 'w', newline='', encoding='utf-8') if options.output else sys.stdout
+    try:
+        for chunk in export_chunks(db, options.kind, options.format, since):
+            out.write(chunk)
+    except sqlite3.Error as e:
+        print(f"❌ Export failed: {e}", file=sys.stderr)
+        return False
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        db.close()
+    if options.output:
+        print(f"✅ Exported {options.kind} to {options.output}", file=sys.stderr)
+    return True
+
 def main():
     """Main menu"""
     while True:
@@ -148,10 +311,11 @@ def main():
         print("2. Add new product")
         print("3. Bulk add from CSV")
         print("4. Delete product")
-        print("5. Exit")
+        print("5. Search products")
+        print("6. Exit")
         print("="*50)
         
-        choice = input("Enter your choice (1-5): ").strip()
+        choice = input("Enter your choice (1-6): ").strip()
         
         if choice == '1':
             view_products()
@@ -162,11 +326,26 @@ def main():
         elif choice == '4':
             delete_product()
         elif choice == '5':
+            search_products()
+        elif choice == '6':
             print("\n👋 Goodbye!")
             break
         else:
             print("❌ Invalid choice!")
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        if sys.argv[1] == 'compile':
+            sys.exit(0 if compile_catalog() else 1)
+        if sys.argv[1] == 'import-sqlite':
+            sys.exit(0 if import_to_sqlite() else 1)
+        if sys.argv[1] == 'sync-stripe':
+            sys.exit(0 if sync_stripe() else 1)
+        if sys.argv[1] == 'export':
+            sys.exit(0 if export_data(sys.argv[2:]) else 1)
+        print(f"Unknown command: {sys.argv[1]}")
+        print("Usage: manage_products.py [compile | import-sqlite | sync-stripe | export orders|reviews]")
+        sys.exit(2)
+    
     print("\n🍰 Welcome to Fondant Toppers Booth Product Manager!")
     main()
@@ -0,0 +1,263 @@
+"""
+Server-side shopping carts.
+
+The signed session cookie used to carry the whole cart (names, image URLs,
+prices) and grew with every item. Now it only holds a cart id and a revision
+number. Items are stored in the `carts` table as compact
+(product_id, variant, color, quantity) tuples, with an in-process LRU in
+front of SQLite. Unit prices come from the catalog (never from the client)
+and names and images are joined from it when the cart is rendered, so they
+always match the current catalog.
+
+A cached cart is only used when its revision matches the one in the
+request's cookie. Another worker that changed the same cart bumps the
+revision, so a stale entry is reloaded from SQLite instead of served.
+
+Carts untouched for CART_TTL_DAYS are deleted, at most once every
+CART_CLEANUP_SECONDS per process, when a cart is saved. Where the database
+cannot be used (e.g. a read-only deploy without the schema), the routes
+keep the compact items in the session cookie instead (see session_items).
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from catalog import catalog
+from db import pool
+from log import get_logger
+
+log = get_logger(__name__)
+
+CART_CACHE_SIZE = int(os.getenv('CART_CACHE_SIZE', 10000))
+CART_TTL_DAYS = int(os.getenv('CART_TTL_DAYS', 30))
+CART_CLEANUP_SECONDS = float(os.getenv('CART_CLEANUP_SECONDS', 3600))
+
+
+def unit_price_cents(product, variant):
+    """Catalog price of a product in the given variant, in cents"""
+    for option in product.get('variants', ()):
+        if option['name'] == variant:
+            return product['price_cents'] + int(option['price_modifier']) * 100
+    return product['price_cents']
+
+
+def catalog_variant(product, variant):
+    """variant if the product has it, else '' (priced at the base price)"""
+    return variant if any(option['name'] == variant for option in product.get('variants', ())) else ''
+
+
+class Cart:
+    """Cart lines keyed by (product_id, variant, color) with running totals
+
+    lines maps each key to an immutable (quantity, unit_cents) pair, and
+    count/subtotal_cents are adjusted on every change, so lookups, updates
+    and totals are all O(1). Carts returned by CartStore.load() are shared
+    with the cache; copy() one before changing it.
+    """
+
+    def __init__(self, catalog_version=None):
+        self.lines = {}
+        self.count = 0
+        self.subtotal_cents = 0
+        self.catalog_version = catalog_version
+
+    @classmethod
+    def from_items(cls, items, catalog):
+        """Price stored (product_id, variant, color, quantity) items against the catalog"""
+        snapshot = catalog.snapshot()
+        cart = cls(snapshot.version)
+        for product_id, variant, color, quantity in items:
+            product = snapshot.get(product_id)
+            if product is not None:
+                cart._set((product_id, variant, color), quantity, unit_price_cents(product, variant))
+        return cart
+
+    def copy(self):
+        cart = Cart(self.catalog_version)
+        cart.lines = dict(self.lines)
+        cart.count = self.count
+        cart.subtotal_cents = self.subtotal_cents
+        return cart
+
+    def _set(self, key, quantity, unit_cents):
+        old = self.lines.pop(key, None)
+        if old is not None:
+            self.count -= old[0]
+            self.subtotal_cents -= old[0] * old[1]
+        if quantity > 0:
+            self.lines[key] = (quantity, unit_cents)
+            self.count += quantity
+            self.subtotal_cents += quantity * unit_cents
+
+    def add(self, key, quantity, unit_cents):
+        line = self.lines.get(key)
+        self._set(key, quantity + (line[0] if line else 0), unit_cents)
+
+    def set_quantity(self, key, quantity):
+        """Change a line's quantity; returns False if the cart has no such line"""
+        line = self.lines.get(key)
+        if line is None:
+            return False
+        self._set(key, quantity, line[1])
+        return True
+
+    def remove(self, key):
+        self._set(key, 0, 0)
+
+    def items(self):
+        """Compact (product_id, variant, color, quantity) tuples for storage"""
+        return [key + (quantity,) for key, (quantity, _) in self.lines.items()]
+
+    def __len__(self):
+        return len(self.lines)
+
+
+def session_items(stored):
+    """(product_id, variant, color, quantity) tuples of a cart kept in the session cookie
+
+    Accepts the compact lists written when the cart store is unavailable and
+    the dicts written by versions before server-side carts; malformed
+    entries are skipped.
+    """
+    items = []
+    for item in stored or ():
+        try:
+            if isinstance(item, dict):
+                item = (item['product_id'], item.get('variant', ''), item.get('color', ''), item['quantity'])
+            product_id, variant, color, quantity = item
+            items.append((int(product_id), variant or '', color or '', max(1, int(quantity))))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return items
+
+
+def cart_lines(cart, catalog):
+    """Display rows for a cart, joining names and images from the catalog"""
+    lines = []
+    for (product_id, variant, color), (quantity, unit_cents) in cart.lines.items():
+        product = catalog.get(product_id)
+        if product is None:
+            continue
+        lines.append({
+            'product_id': product_id,
+            'name': product['title'],
+            'image': product['image_url'],
+            'variant': variant,
+            'color': color,
+            'quantity': quantity,
+            'unit_cents': unit_cents,
+            'price': unit_cents / 100,
+            'line_cents': unit_cents * quantity,
+        })
+    return lines
+
+
+class CartStore:
+    """SQLite-backed carts with an LRU cache of recently used ones"""
+
+    def __init__(self, pool, catalog, cache_size=CART_CACHE_SIZE, ttl_days=CART_TTL_DAYS,
+                 cleanup_seconds=CART_CLEANUP_SECONDS):
+        self.pool = pool
+        self.catalog = catalog
+        self.cache_size = cache_size
+        self.ttl_days = ttl_days
+        self.cleanup_seconds = cleanup_seconds
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_cleanup = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.expired = 0
+
+    @staticmethod
+    def new_id():
+        return secrets.token_urlsafe(16)
+
+    def _cache_put(self, cart_id, revision, cart):
+        with self._lock:
+            self._cache[cart_id] = (revision, cart)
+            self._cache.move_to_end(cart_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def load(self, cart_id, revision):
+        """The (shared, read-only) Cart for an id; an empty Cart for unknown ids"""
+        if not cart_id:
+            return Cart(self.catalog.version)
+        with self._lock:
+            cached = self._cache.get(cart_id)
+            if cached is not None and cached[0] == revision:
+                self._cache.move_to_end(cart_id)
+                self.hits += 1
+            else:
+                cached = None
+        if cached is not None:
+            cart = cached[1]
+            if cart.catalog_version != self.catalog.version:
+                # Prices may have changed; re-price once and keep the result
+                cart = Cart.from_items(cart.items(), self.catalog)
+                self._cache_put(cart_id, revision, cart)
+            return cart
+
+        self.misses += 1
+        db = self.pool.acquire()
+        try:
+            row = db.execute('SELECT revision, items FROM carts WHERE id = ?', (cart_id,)).fetchone()
+        finally:
+            self.pool.release(db)
+        if row is None:
+            return Cart(self.catalog.version)
+        cart = Cart.from_items(json.loads(row['items']), self.catalog)
+        self._cache_put(cart_id, row['revision'], cart)
+        return cart
+
+    def save(self, cart_id, cart):
+        """Write a cart through to SQLite; returns its new revision"""
+        payload = json.dumps(cart.items(), separators=(',', ':'))
+        db = self.pool.acquire()
+        try:
+            revision = db.execute(
+                '''
+                INSERT INTO carts (id, items) VALUES (?, ?)
+                ON CONFLICT (id) DO UPDATE
+                    SET items = excluded.items, revision = revision + 1, updated_at = CURRENT_TIMESTAMP
+                RETURNING revision
+                ''',
+                (cart_id, payload)
+            ).fetchone()[0]
+            db.commit()
+            if time.monotonic() >= self._next_cleanup:
+                try:
+                    self.delete_expired(db)
+                except sqlite3.Error as e:
+                    # The cart itself is saved; try again after the next interval
+                    log.warning('Could not delete expired carts: %s', e)
+        finally:
+            self.pool.release(db)
+        self.writes += 1
+        self._cache_put(cart_id, revision, cart)
+        return revision
+
+    def delete_expired(self, db):
+        """Delete carts not updated for ttl_days; returns how many were removed"""
+        self._next_cleanup = time.monotonic() + self.cleanup_seconds
+        deleted = db.execute(
+            "DELETE FROM carts WHERE updated_at < datetime('now', ?)", (f'-{self.ttl_days} days',)
+        ).rowcount
+        db.commit()
+        self.expired += deleted
+        return deleted
+
+    def stats(self):
+        return {'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses, 'writes': self.writes,
+                'expired': self.expired}
+
+
+# Server-side carts; the session cookie only holds the cart id
+cart_store = CartStore(pool, catalog)
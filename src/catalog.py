@@ -0,0 +1,433 @@
+"""
+Product catalog cache for the Fondant Toppers Booth storefront.
+
+The catalog is parsed from data/extracted_products.json once per process and
+kept in memory as an immutable snapshot. Every lookup does a cheap stat() of
+the file; the file is only re-read when its mtime or size changes, and only
+re-parsed when the content hash actually differs.
+
+Long-running workers can instead call start_watching(): a watchdog observer
+reloads the file in the background and swaps the snapshot in one assignment,
+so request threads never stat or parse the file themselves.
+
+If a precompiled artifact (data/catalog.bin, see catalog_artifact.py) was
+built from the current JSON, the first load decodes that instead of parsing
+and enriching every product.
+
+With CATALOG_BACKEND=sqlite the products come from the SQLite store in
+catalog_store.py instead, with the same snapshot and listener behaviour.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from decimal import Decimal, ROUND_HALF_UP
+from types import MappingProxyType
+
+from catalog_artifact import ArtifactError, read_artifact, write_artifact
+from catalog_store import SQLiteCatalogStore
+from log import get_logger
+from metrics import timed
+
+log = get_logger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+CATALOG_FILE = os.path.join(DATA_DIR, 'extracted_products.json')
+ARTIFACT_FILE = os.path.join(DATA_DIR, 'catalog.bin')
+
+# SQLite backend: how long a read of the catalog version counter is trusted
+CATALOG_VERSION_TTL = float(os.getenv('CATALOG_VERSION_TTL', 1))
+
+# Placeholder detail data shown on every product page until per-product
+# variants are tracked in the catalog itself
+DEFAULT_VARIANTS = [
+    {'name': 'Small', 'price_modifier': 0},
+    {'name': 'Medium', 'price_modifier': 5},
+    {'name': 'Large', 'price_modifier': 10}
+]
+DEFAULT_COLORS = ['Pink', 'Blue', 'White', 'Pastel Mix', 'Custom']
+DEFAULT_DESCRIPTION = 'Handcrafted fondant decoration perfect for adding a special touch to your celebration. Each piece is carefully made with attention to detail using high-quality, food-safe fondant. Can be customized to match your color scheme and theme.'
+DEFAULT_DETAILS = [
+    'Handmade with premium fondant',
+    '100% edible and food-safe',
+    'Custom colors available upon request',
+    'Made to order - ships within 1-2 weeks',
+    'Store in cool, dry place away from direct sunlight'
+]
+
+
+def price_to_cents(price):
+    """Convert a price like '4.20' or 4.2 to integer cents"""
+    return int((Decimal(str(price)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def enrich_product(product):
+    """Fill in the derived and detail-page fields for a product dict"""
+    product['price_cents'] = price_to_cents(product['price'])
+    product.setdefault('variants', DEFAULT_VARIANTS)
+    product.setdefault('colors', DEFAULT_COLORS)
+    product.setdefault('description', DEFAULT_DESCRIPTION)
+    product.setdefault('details', DEFAULT_DETAILS)
+    return product
+
+
+SUMMARY_FIELDS = ('id', 'title', 'price', 'price_cents', 'link', 'image_url')
+
+
+def product_summary(product):
+    """JSON-friendly subset of a product record for listing APIs"""
+    return {field: product.get(field) for field in SUMMARY_FIELDS}
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def freeze_product(product):
+    """Return a read-only view of a product record"""
+    return _freeze(dict(product))
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at a single version"""
+
+    def __init__(self, products, digest=''):
+        # Kept in id order so keyset pagination can bisect on ids
+        self.products = tuple(freeze_product(p) for p in sorted(products, key=lambda p: p['id']))
+        self.ids = tuple(p['id'] for p in self.products)
+        self.by_id = {p['id']: p for p in self.products}
+        self.digest = digest
+        self.version = digest[:16] if digest else 'empty'
+        self.loaded_at = time.time()
+
+    def get(self, product_id):
+        return self.by_id.get(product_id)
+
+    def page(self, after=None, limit=24):
+        """Keyset page of products with id > after; returns (products, next_cursor)"""
+        start = 0 if after is None else bisect_right(self.ids, after)
+        items = self.products[start:start + limit]
+        has_more = start + limit < len(self.products)
+        return items, (items[-1]['id'] if has_more and items else None)
+
+    def __len__(self):
+        return len(self.products)
+
+
+def parse_catalog(raw):
+    """Parse catalog JSON bytes into a list of product dicts with ids assigned"""
+    data = json.loads(raw)
+    if not isinstance(data, list):
+        raise ValueError('Catalog root must be a list of products')
+
+    products = []
+    for idx, item in enumerate(data):
+        if not isinstance(item, dict) or 'title' not in item or 'price' not in item:
+            raise ValueError(f'Invalid product entry at position {idx}')
+        product = dict(item)
+        product['id'] = idx
+        try:
+            enrich_product(product)
+        except ArithmeticError:
+            raise ValueError(f'Invalid price for product at position {idx}')
+        products.append(product)
+    return products
+
+
+def compile_catalog(source=CATALOG_FILE, target=ARTIFACT_FILE):
+    """Build the precompiled artifact from the catalog JSON; returns the product count"""
+    with open(source, 'rb') as f:
+        raw = f.read()
+    products = parse_catalog(raw)
+    write_artifact(products, hashlib.sha256(raw).hexdigest(), target)
+    return len(products)
+
+
+class ProductCatalog:
+    """Process-wide catalog cache with file-change invalidation"""
+
+    def __init__(self, path=CATALOG_FILE, artifact_path=ARTIFACT_FILE):
+        self.path = path
+        self.artifact_path = artifact_path
+        self._lock = threading.Lock()
+        self._snapshot = CatalogSnapshot([])
+        self._file_key = None
+        self._loaded = False
+        self._observer = None
+        self._observer_pid = None
+        self._debounce = 0.25
+        self._watch_lock = threading.Lock()
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def snapshot(self):
+        """Return the current snapshot, reloading it if the file changed"""
+        if self._observer is not None:
+            if self._observer_pid != os.getpid():
+                self._check_fork()
+            # The watcher keeps the snapshot fresh; never touch the file here
+            self.hits += 1
+            return self._snapshot
+
+        key = self._stat_key()
+        if self._loaded and key == self._file_key:
+            self.hits += 1
+            return self._snapshot
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self._loaded and key == self._file_key:
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            with timed('catalog'):
+                self._refresh(key)
+            return self._snapshot
+
+    def _read_source(self):
+        """Return (digest, loader) for the current source; loader() parses it"""
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        def load():
+            products = self._artifact_products(digest)
+            return products if products is not None else parse_catalog(raw)
+        return digest, load
+
+    def _refresh(self, key):
+        try:
+            digest, load = self._read_source()
+        except (OSError, sqlite3.Error) as e:
+            log.error('Error loading products: %s', e)
+            self._file_key = key
+            self._loaded = True
+            return
+
+        if digest == self._snapshot.digest:
+            # Touched but unchanged - keep the parsed snapshot
+            self._file_key = key
+            self._loaded = True
+            return
+
+        try:
+            snapshot = CatalogSnapshot(load(), digest)
+        except (json.JSONDecodeError, ValueError, sqlite3.Error) as e:
+            # Keep serving the last good snapshot
+            log.error('Error loading products: %s', e)
+            self._file_key = key
+            self._loaded = True
+            return
+
+        if self._loaded:
+            self.reloads += 1
+        previous = self._snapshot
+        self._snapshot = snapshot
+        self._file_key = key
+        self._loaded = True
+        self._notify(previous, snapshot)
+
+    def add_listener(self, callback):
+        """Call callback(old_snapshot, new_snapshot) whenever a new snapshot goes live.
+
+        If the catalog is already loaded the callback is invoked right away
+        with an empty old snapshot, so derived data can be built once up front.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+            if self._loaded:
+                self._call_listener(callback, CatalogSnapshot([]), self._snapshot)
+
+    def _notify(self, previous, snapshot):
+        for callback in self._listeners:
+            self._call_listener(callback, previous, snapshot)
+
+    def _call_listener(self, callback, previous, snapshot):
+        try:
+            callback(previous, snapshot)
+        except Exception:
+            log.exception('Error in catalog reload listener %r', callback)
+
+    def _artifact_products(self, digest):
+        """Products from the precompiled artifact, if it matches the JSON digest"""
+        if not self.artifact_path or self._loaded or not os.path.exists(self.artifact_path):
+            return None
+        try:
+            artifact_digest, products = read_artifact(self.artifact_path)
+        except (OSError, ArtifactError) as e:
+            log.warning('Ignoring catalog artifact: %s', e)
+            return None
+        if artifact_digest != digest:
+            log.warning('Catalog artifact is stale; run `python manage_products.py compile`')
+            return None
+        return products
+
+    def reload(self):
+        """Re-read the file now and swap in the new snapshot if it is valid"""
+        with self._lock:
+            self.misses += 1
+            with timed('catalog'):
+                self._refresh(self._stat_key())
+        return self._snapshot
+
+    def _check_fork(self):
+        # The watcher thread stays behind in the parent (gunicorn --preload);
+        # start one of our own so this worker still sees catalog changes
+        with self._watch_lock:
+            if self._observer is not None and self._observer_pid != os.getpid():
+                self._observer = None
+                self.start_watching(self._debounce)
+
+    def start_watching(self, debounce=0.25):
+        """Reload the catalog from a background filesystem watcher"""
+        if self._observer is not None and self._observer_pid == os.getpid():
+            return True
+        try:
+            from watchdog.observers import Observer
+        except ImportError:  # watchdog is optional outside long-running workers
+            log.warning('watchdog is not installed; catalog hot reload disabled')
+            return False
+
+        # Prime the snapshot so the first request never parses
+        self.reload()
+
+        handler = _CatalogFileHandler(self, debounce)
+        observer = Observer()
+        observer.daemon = True
+        observer.schedule(handler, os.path.dirname(self.path), recursive=False)
+        observer.start()
+        self._debounce = debounce
+        self._observer_pid = os.getpid()
+        self._observer = observer
+        return True
+
+    def stop_watching(self):
+        observer, self._observer = self._observer, None
+        if observer is not None and self._observer_pid == os.getpid():
+            observer.stop()
+            observer.join(timeout=2)
+
+    def products(self):
+        return self.snapshot().products
+
+    def get(self, product_id):
+        return self.snapshot().get(product_id)
+
+    @property
+    def version(self):
+        return self.snapshot().version
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads,
+            'products': len(self._snapshot),
+            'version': self._snapshot.version,
+            'watching': self._observer is not None and self._observer_pid == os.getpid(),
+        }
+
+
+class _CatalogFileHandler:
+    """Coalesce filesystem events for the catalog file into one reload
+
+    Observers only call dispatch(event), so this does not need to subclass
+    watchdog's FileSystemEventHandler (and importing watchdog can wait until
+    a watcher is started).
+    """
+
+    def __init__(self, catalog, debounce):
+        self.catalog = catalog
+        self.debounce = debounce
+        self._timer = None
+        self._timer_lock = threading.Lock()
+
+    def _is_catalog(self, path):
+        return os.path.abspath(path) == os.path.abspath(self.catalog.path)
+
+    def dispatch(self, event):
+        # Ignore open/close events, including the ones our own reload causes
+        if event.is_directory or event.event_type not in ('created', 'modified', 'moved'):
+            return
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        if not any(p and self._is_catalog(p) for p in paths):
+            return
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.catalog.reload)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+class SQLiteProductCatalog(ProductCatalog):
+    """Catalog cache backed by the products table instead of the JSON file.
+
+    Change detection reads the catalog_meta version counter, so an unchanged
+    catalog costs one indexed lookup per check rather than a table scan, and
+    the counter is read at most every CATALOG_VERSION_TTL seconds rather than
+    on every snapshot() call.
+    """
+
+    def __init__(self, store, version_ttl=CATALOG_VERSION_TTL):
+        super().__init__(path=store.db_path, artifact_path=None)
+        self.store = store
+        self.version_ttl = version_ttl
+        self._version_key = None
+        self._version_checked = None
+
+    def _stat_key(self):
+        now = time.monotonic()
+        checked = self._version_checked
+        if checked is not None and now - checked < self.version_ttl:
+            return self._version_key
+        try:
+            key = self.store.version()
+        except sqlite3.Error:
+            key = None
+        self._version_key, self._version_checked = key, now
+        return key
+
+    def _read_source(self):
+        version = self.store.version()
+        if version is None:
+            raise sqlite3.OperationalError('products table has not been created')
+        digest = hashlib.sha256(f"{self.store.db_path}:{version}".encode()).hexdigest()
+
+        def load():
+            return [enrich_product(p) for p in self.store.load_products()]
+        return digest, load
+
+
+def create_catalog():
+    """Build the process-wide catalog for the configured backend"""
+    if os.getenv('CATALOG_BACKEND', 'json') == 'sqlite':
+        store = SQLiteCatalogStore(os.getenv('CATALOG_DATABASE', 'fondant_shop.db'))
+        try:
+            store.ensure_schema()
+        except sqlite3.Error as e:
+            log.error('Error creating catalog tables: %s', e)
+        return SQLiteProductCatalog(store)
+    return ProductCatalog(
+        artifact_path=ARTIFACT_FILE if os.getenv('CATALOG_ARTIFACT', 'True') == 'True' else None
+    )
+
+
+catalog = create_catalog()
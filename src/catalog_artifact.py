@@ -0,0 +1,156 @@
+"""
+Precompiled catalog artifact.
+
+`python manage_products.py compile` turns extracted_products.json into a
+compact columnar binary file (data/catalog.bin) with ids, integer-cent prices
+and the enriched product-detail fields already filled in. The app loads it
+with a single read at import time instead of parsing and enriching the JSON.
+
+Layout (all integers little-endian):
+
+    header   magic b'FTCA', format version (H), column count (H),
+             product count (I), sha256 of the source JSON (32 bytes)
+    strings  string count (I), offsets (I * (count + 1)), utf-8 blob
+    columns  for each column: name length (H), name, type code (1 byte),
+             then `product count` fixed-width values
+
+Integer columns hold values directly ('q'); string columns ('I') hold
+indexes into the deduplicated string table. List fields such as variants are
+stored as JSON strings in the table, so each distinct value is decoded once.
+No pickle is involved, so the file is safe to ship with the deployment.
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b'FTCA'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHI32s')
+
+INT_COLUMNS = ('id', 'price_cents')
+STRING_COLUMNS = ('title', 'price', 'link', 'image_url', 'description')
+JSON_COLUMNS = ('variants', 'colors', 'details')
+
+
+class ArtifactError(ValueError):
+    """Raised when an artifact is missing, corrupt or from another format version"""
+
+
+def _le_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def dump_artifact(products, source_digest):
+    """Serialize enriched product dicts into artifact bytes"""
+    strings = []
+    string_ids = {}
+
+    def intern(value):
+        idx = string_ids.get(value)
+        if idx is None:
+            idx = string_ids[value] = len(strings)
+            strings.append(value)
+        return idx
+
+    columns = []
+    for name in INT_COLUMNS:
+        columns.append((name, 'q', array('q', (int(p[name]) for p in products))))
+    for name in STRING_COLUMNS:
+        columns.append((name, 'I', array('I', (intern(str(p.get(name, ''))) for p in products))))
+    for name in JSON_COLUMNS:
+        columns.append((name, 'J', array('I', (
+            intern(json.dumps(p.get(name, []), separators=(',', ':'))) for p in products))))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('I', [0])
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(columns), len(products), bytes.fromhex(source_digest)),
+        struct.pack('<I', len(strings)),
+        _le_bytes(offsets),
+        b''.join(encoded),
+    ]
+    for name, code, values in columns:
+        raw_name = name.encode('ascii')
+        parts.append(struct.pack('<H', len(raw_name)))
+        parts.append(raw_name)
+        parts.append(code.encode('ascii'))
+        parts.append(_le_bytes(values))
+    return b''.join(parts)
+
+
+def load_artifact(data):
+    """Decode artifact bytes into (source_digest, list of product dicts)"""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise ArtifactError('Catalog artifact is truncated')
+    magic, version, ncols, count, digest = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ArtifactError('Unsupported catalog artifact format')
+    pos = HEADER.size
+
+    try:
+        (nstrings,) = struct.unpack_from('<I', view, pos)
+        pos += 4
+        offsets = _from_le('I', view[pos:pos + 4 * (nstrings + 1)])
+        pos += 4 * (nstrings + 1)
+        blob = bytes(view[pos:pos + offsets[-1]])
+        pos += offsets[-1]
+        strings = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(nstrings)]
+
+        columns = {}
+        for _ in range(ncols):
+            (name_len,) = struct.unpack_from('<H', view, pos)
+            pos += 2
+            name = bytes(view[pos:pos + name_len]).decode('ascii')
+            pos += name_len
+            code = chr(view[pos])
+            pos += 1
+            width = 8 if code == 'q' else 4
+            values = _from_le('q' if code == 'q' else 'I', view[pos:pos + width * count])
+            pos += width * count
+            if code == 'I':
+                values = [strings[i] for i in values]
+            elif code == 'J':
+                decoded = {i: json.loads(strings[i]) for i in set(values)}
+                values = [decoded[i] for i in values]
+            columns[name] = values
+    except (struct.error, IndexError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ArtifactError(f'Corrupt catalog artifact: {e}')
+
+    if any(len(values) != count for values in columns.values()):
+        raise ArtifactError('Corrupt catalog artifact: column length mismatch')
+
+    names = list(columns)
+    products = [dict(zip(names, row)) for row in zip(*columns.values())]
+    return digest.hex(), products
+
+
+def write_artifact(products, source_digest, path):
+    """Write the artifact atomically next to the catalog"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(dump_artifact(products, source_digest))
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path):
+    """Load an artifact file with a single read"""
+    with open(path, 'rb') as f:
+        return load_artifact(f.read())
@@ -0,0 +1,186 @@
+"""
+SQLite catalog backend.
+
+An alternative to the flat JSON file: products live in a `products` table in
+fondant_shop.db with an FTS5 index over titles kept in sync by triggers. Ids
+are stable primary keys, so adding or deleting one product is a single-row
+write and never renumbers the others.
+
+A `catalog_meta` version counter is bumped by the same triggers, which lets
+the in-process catalog cache check for changes with one tiny query instead of
+re-reading the table.
+"""
+
+import sqlite3
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        price TEXT NOT NULL,
+        price_cents INTEGER NOT NULL,
+        link TEXT NOT NULL DEFAULT '',
+        image_url TEXT NOT NULL DEFAULT '',
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        title, content='products', content_rowid='id'
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS catalog_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    ''',
+    "INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', 0)",
+    '''
+    CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, title) VALUES (new.id, new.title);
+        UPDATE catalog_meta SET value = value + 1 WHERE key = 'version';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        UPDATE catalog_meta SET value = value + 1 WHERE key = 'version';
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        INSERT INTO products_fts (rowid, title) VALUES (new.id, new.title);
+        UPDATE catalog_meta SET value = value + 1 WHERE key = 'version';
+    END
+    ''',
+]
+
+
+class SQLiteCatalogStore:
+    """Products table + FTS5 index in the shop database"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def connect(self):
+        db = sqlite3.connect(self.db_path)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def ensure_schema(self):
+        db = self.connect()
+        try:
+            for statement in SCHEMA:
+                db.execute(statement)
+            db.commit()
+        finally:
+            db.close()
+
+    def version(self):
+        """Change counter bumped on every insert, update or delete"""
+        db = self.connect()
+        try:
+            row = db.execute("SELECT value FROM catalog_meta WHERE key = 'version'").fetchone()
+        finally:
+            db.close()
+        return row[0] if row else None
+
+    def load_products(self):
+        db = self.connect()
+        try:
+            rows = db.execute(
+                'SELECT id, title, price, price_cents, link, image_url FROM products ORDER BY id'
+            ).fetchall()
+        finally:
+            db.close()
+        return [dict(row) for row in rows]
+
+    def get(self, product_id):
+        db = self.connect()
+        try:
+            row = db.execute(
+                'SELECT id, title, price, price_cents, link, image_url FROM products WHERE id = ?',
+                (product_id,)
+            ).fetchone()
+        finally:
+            db.close()
+        return dict(row) if row else None
+
+    def add_product(self, title, price, link, image_url, price_cents, product_id=None):
+        """Insert one product and return its id"""
+        db = self.connect()
+        try:
+            cursor = db.execute(
+                'INSERT INTO products (id, title, price, price_cents, link, image_url) VALUES (?, ?, ?, ?, ?, ?)',
+                (product_id, title, price, price_cents, link, image_url)
+            )
+            db.commit()
+            return cursor.lastrowid
+        finally:
+            db.close()
+
+    def delete_product(self, product_id):
+        """Delete one product by id; returns True if it existed"""
+        db = self.connect()
+        try:
+            cursor = db.execute('DELETE FROM products WHERE id = ?', (product_id,))
+            db.commit()
+            return cursor.rowcount > 0
+        finally:
+            db.close()
+
+    def import_products(self, products):
+        """Bulk-load product dicts, keeping their ids; returns the row count
+
+        Existing ids are updated in place rather than replaced: REPLACE deletes
+        the old row without firing products_ad, which would leave its title in
+        products_fts.
+        """
+        db = self.connect()
+        try:
+            with db:
+                db.executemany(
+                    '''
+                    INSERT INTO products (id, title, price, price_cents, link, image_url)
+                    VALUES (:id, :title, :price, :price_cents, :link, :image_url)
+                    ON CONFLICT(id) DO UPDATE SET
+                        title = excluded.title, price = excluded.price, price_cents = excluded.price_cents,
+                        link = excluded.link, image_url = excluded.image_url, updated_at = CURRENT_TIMESTAMP
+                    ''',
+                    [{
+                        'id': p.get('id'),
+                        'title': p['title'],
+                        'price': p['price'],
+                        'price_cents': p['price_cents'],
+                        'link': p.get('link', ''),
+                        'image_url': p.get('image_url', ''),
+                    } for p in products]
+                )
+            return len(products)
+        finally:
+            db.close()
+
+    def search(self, query, limit=50):
+        """Full-text title search ranked by bm25; returns product dicts"""
+        terms = ' '.join(f'"{token}"' for token in query.replace('"', ' ').split())
+        if not terms:
+            return []
+        db = self.connect()
+        try:
+            rows = db.execute(
+                '''
+                SELECT p.id, p.title, p.price, p.price_cents, p.link, p.image_url
+                FROM products_fts f
+                JOIN products p ON p.id = f.rowid
+                WHERE products_fts MATCH ?
+                ORDER BY bm25(products_fts)
+                LIMIT ?
+                ''',
+                (terms, limit)
+            ).fetchall()
+        finally:
+            db.close()
+        return [dict(row) for row in rows]
@@ -0,0 +1,127 @@
+"""
+Streaming CSV / NDJSON exports of orders and reviews for reporting.
+
+Rows are read from a SQLite cursor in fetchmany() batches and encoded into
+chunks of a few hundred rows, so memory stays flat however many rows are
+exported. `since` filters on created_at and is served by the created_at
+indexes.
+
+Orders export one CSV row per order item (order columns repeated), or one
+NDJSON object per order with its items nested. Both come from one ordered
+LEFT JOIN that is grouped while streaming, not from a query per order.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import groupby
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+FETCH_SIZE = 500
+
+ORDER_COLUMNS = ('order_id', 'created_at', 'status', 'customer_uid', 'customer_email', 'customer_name',
+                 'user_id', 'total_cents', 'stripe_session_id')
+ORDER_ITEM_COLUMNS = ('product_id', 'product_name', 'variant', 'color', 'unit_cents', 'quantity')
+REVIEW_COLUMNS = ('id', 'created_at', 'user_name', 'user_email', 'rating', 'approved', 'review_text')
+
+ORDERS_QUERY = '''
+    SELECT o.id AS order_id, o.created_at, o.status, o.customer_uid, o.customer_email, o.customer_name,
+           o.user_id, COALESCE(o.total_cents, CAST(ROUND(o.product_price * 100) AS INTEGER)) AS total_cents,
+           o.stripe_session_id,
+           i.product_id, COALESCE(i.product_name, o.product_name) AS product_name,
+           i.variant, i.color, i.unit_cents, i.quantity
+    FROM orders o
+    LEFT JOIN order_items i ON i.order_id = o.id
+    {where}
+    ORDER BY o.created_at, o.id, i.id
+'''
+REVIEWS_QUERY = '''
+    SELECT id, created_at, user_name, user_email, rating, approved, review_text
+    FROM reviews
+    {where}
+    ORDER BY created_at, id
+'''
+
+
+def parse_since(value):
+    """Normalize an ISO date/datetime to SQLite's CURRENT_TIMESTAMP format; None passes through"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _rows(db, query, table_alias, since):
+    where = f'WHERE {table_alias}created_at >= ?' if since else ''
+    cursor = db.execute(query.format(where=where), (since,) if since else ())
+    while True:
+        batch = cursor.fetchmany(FETCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def order_rows(db, since=None):
+    """One row per order item (orders without items yield a single row)"""
+    return _rows(db, ORDERS_QUERY, 'o.', since)
+
+
+def review_rows(db, since=None):
+    return _rows(db, REVIEWS_QUERY, '', since)
+
+
+def orders_as_objects(rows):
+    """Group consecutive order rows into one dict per order with nested items"""
+    for _, group in groupby(rows, key=lambda row: row['order_id']):
+        group = list(group)
+        order = {column: group[0][column] for column in ORDER_COLUMNS}
+        order['items'] = [
+            {column: row[column] for column in ORDER_ITEM_COLUMNS}
+            for row in group if row['quantity'] is not None
+        ]
+        yield order
+
+
+def csv_chunks(columns, rows, chunk_rows=FETCH_SIZE):
+    """Encode rows as CSV text chunks of up to chunk_rows rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def ndjson_chunks(objects, chunk_rows=FETCH_SIZE):
+    """Encode dicts as newline-delimited JSON chunks"""
+    lines = []
+    for obj in objects:
+        lines.append(json.dumps(obj, separators=(',', ':')))
+        if len(lines) == chunk_rows:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_chunks(db, kind, fmt, since=None):
+    """Text chunks of an 'orders' or 'reviews' export in 'csv' or 'ndjson' format"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format: {fmt}')
+    if kind == 'orders':
+        rows = order_rows(db, since)
+        if fmt == 'csv':
+            return csv_chunks(ORDER_COLUMNS + ORDER_ITEM_COLUMNS, rows)
+        return ndjson_chunks(orders_as_objects(rows))
+    if kind == 'reviews':
+        rows = review_rows(db, since)
+        if fmt == 'csv':
+            return csv_chunks(REVIEW_COLUMNS, rows)
+        return ndjson_chunks({column: row[column] for column in REVIEW_COLUMNS} for row in rows)
+    raise ValueError(f'Unknown export: {kind}')
@@ -0,0 +1,85 @@
+"""
+Application factory.
+
+Routes live in blueprints under views/, one module per area of the shop.
+create_app() imports and registers only the blueprints it is given, so a
+serverless function that serves a single area (e.g. webhook_app.py for
+Stripe webhooks) never imports the catalog, search index or page caches
+the storefront needs.
+"""
+
+import importlib
+import sqlite3
+
+# First, so a local .env is loaded before other modules read their settings
+import settings
+
+from flask import Flask
+
+import db as db_pool
+import metrics
+from log import fingerprint, get_logger, setup_logging
+from stripe_prices import configure_stripe
+
+log = get_logger(__name__)
+
+# views.<name> modules, each exposing a Blueprint named `bp`
+BLUEPRINTS = ('catalog', 'cart', 'checkout', 'webhooks', 'auth', 'content', 'admin')
+
+
+def run_migrations(path):
+    """Pool setup hook: apply pending migrations before the first connection is opened"""
+    from migrations import migrate
+    try:
+        migrate(path)
+    except sqlite3.Error as e:
+        log.warning('Database migrations skipped: %s', e)
+
+
+def create_app(blueprints=BLUEPRINTS):
+    # Structured logging; records are written to stdout by a background thread
+    setup_logging()
+
+    app = Flask(__name__)
+    app.secret_key = settings.SECRET_KEY
+
+    # Session configuration for production hosting
+    app.config['SESSION_COOKIE_SECURE'] = settings.SESSION_COOKIE_SECURE
+    app.config['SESSION_COOKIE_HTTPONLY'] = True  # Prevent JavaScript access to session cookie
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'  # CSRF protection
+    app.config['PERMANENT_SESSION_LIFETIME'] = 86400  # 24 hours in seconds
+    app.config['SESSION_COOKIE_NAME'] = 'fondant_session'  # Custom session cookie name
+
+    # The Stripe SDK is imported on first use (stripe_api()), with one keep-alive
+    # HTTP session for all calls (STRIPE_API_BASE for a fake server)
+    configure_stripe(settings.STRIPE_SECRET_KEY)
+
+    # Report which keys are configured (a fingerprint, never the secret key itself)
+    if not settings.STRIPE_SECRET_KEY:
+        log.warning('STRIPE_SECRET_KEY not found in environment variables; '
+                    'Stripe payments will not work until it is configured')
+    else:
+        log.info('Stripe API key loaded: %s', fingerprint(settings.STRIPE_SECRET_KEY))
+
+    if not settings.STRIPE_PUBLISHABLE_KEY or settings.STRIPE_PUBLISHABLE_KEY == 'pk_test_default':
+        log.warning('STRIPE_PUBLISHABLE_KEY not found in environment variables')
+    else:
+        log.info('Stripe publishable key loaded: %s', settings.STRIPE_PUBLISHABLE_KEY)
+
+    # Apply pending migrations once per process, when it first needs the database,
+    # so serverless cold starts (no background workers, see vercel.json) that only
+    # render catalog pages never open it; bench_import_time.py fails if one does.
+    # On Vercel's read-only filesystem this fails harmlessly and orders are
+    # tracked through the Stripe dashboard.
+    if settings.RUN_DB_MIGRATIONS:
+        db_pool.pool.setup = run_migrations
+
+    # Database configuration - pooled per-process connections (see db.py)
+    db_pool.init_app(app)
+
+    # Optional request timing (METRICS_ENABLED=True), scraped from /metrics
+    metrics.init_app(app, db_pool.pool)
+
+    for name in blueprints:
+        app.register_blueprint(importlib.import_module(f'views.{name}').bp)
+    return app
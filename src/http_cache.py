@@ -0,0 +1,102 @@
+"""
+HTTP conditional GET and Cache-Control for catalog pages and APIs.
+
+Each decorated route gets a strong ETag derived from the route and its
+arguments, the catalog (and other content) version, the hash of the
+templates it renders and the deploy version. A matching If-None-Match is answered with 304 before the view
+runs, so revalidation costs no template rendering at all.
+
+The ETag is the only validator. There is no Last-Modified: the catalog load
+time differs between workers and says nothing about reviews or template
+changes, so If-Modified-Since alone would produce stale 304s and is ignored.
+
+Cache-Control policies are per endpoint and can be overridden through
+app.config['CACHE_CONTROL_POLICIES'] or CACHE_CONTROL_<ENDPOINT> environment
+variables (e.g. CACHE_CONTROL_PRODUCT_DETAIL="public, max-age=60"). Policies
+are keyed by view name without the blueprint ("product_detail", not
+"catalog.product_detail").
+"""
+
+import hashlib
+import os
+from functools import wraps
+
+from flask import current_app, request
+
+from render_cache import content_version, is_anonymous_request
+
+# Changes with every deploy so code-only changes (e.g. FAQ text) invalidate ETags
+DEPLOY_VERSION = os.getenv('VERCEL_GIT_COMMIT_SHA') or os.getenv('APP_VERSION', '')
+
+DEFAULT_POLICIES = {
+    'home': 'public, max-age=60, stale-while-revalidate=600',
+    'products': 'public, max-age=60, stale-while-revalidate=600',
+    'product_cards': 'public, max-age=60, stale-while-revalidate=600',
+    'product_detail': 'public, max-age=300, stale-while-revalidate=3600',
+    'reviews': 'public, max-age=300, stale-while-revalidate=3600',
+    'qa': 'public, max-age=3600, stale-while-revalidate=86400',
+    'api_products': 'public, max-age=60, stale-while-revalidate=600',
+    'api_products_search': 'public, max-age=60, stale-while-revalidate=600',
+}
+FALLBACK_POLICY = 'public, max-age=0, must-revalidate'
+
+_template_hashes = {}
+
+
+def template_hash(name):
+    """sha256 of a template's source, computed once per process"""
+    digest = _template_hashes.get(name)
+    if digest is None:
+        source, _, _ = current_app.jinja_loader.get_source(current_app.jinja_env, name)
+        digest = _template_hashes[name] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    return digest
+
+
+def cache_policy(endpoint):
+    configured = current_app.config.get('CACHE_CONTROL_POLICIES', {})
+    return (configured.get(endpoint)
+            or os.getenv(f'CACHE_CONTROL_{endpoint.upper()}')
+            or DEFAULT_POLICIES.get(endpoint, FALLBACK_POLICY))
+
+
+def compute_etag(templates, view_args, versions=()):
+    parts = [
+        request.endpoint,
+        repr(sorted(view_args.items())),
+        repr(sorted(request.args.items(multi=True))),
+        content_version(versions),
+        DEPLOY_VERSION,
+    ]
+    parts.extend(template_hash(name) for name in templates)
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def conditional(*templates, versions=()):
+    """Add ETag/Cache-Control and answer If-None-Match revalidation with 304.
+
+    templates names every template the view renders, so editing one of them
+    changes the ETag; versions lists extra content version sources (as for
+    cached_page) that the page depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Logged-in users and pending flash messages get the plain response
+            if request.method not in ('GET', 'HEAD') or not is_anonymous_request():
+                return view(*args, **kwargs)
+
+            etag = compute_etag(templates, kwargs, versions)
+            policy = cache_policy(request.endpoint.rpartition('.')[2])
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = policy
+            return response
+        return wrapper
+    return decorator
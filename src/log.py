@@ -0,0 +1,220 @@
+"""
+Structured, queue-backed logging.
+
+Modules log through `get_logger(__name__)` (loggers under "fondant.").
+Handlers only put records on an in-memory queue, and a listener thread
+formats and writes them to stdout. A slow or blocked stdout therefore
+never stalls a request. If the queue is full, records are dropped and
+counted rather than blocking.
+
+Before a record is queued:
+- Its message is rendered.
+- Secrets in it are redacted: Stripe keys, bearer tokens, `token=`/
+  `password=` style pairs, and extra fields with sensitive names.
+- DEBUG records are sampled (LOG_DEBUG_SAMPLE_RATE).
+- Tracebacks are rendered into the message and redacted as well.
+
+Redaction is a safety net; log fingerprint(secret) rather than a secret.
+
+Settings:
+- LOG_LEVEL sets the default level.
+- LOG_LEVELS overrides it per module, e.g. "app=DEBUG,catalog=WARNING".
+- LOG_FORMAT is "text" or "json". Fields passed with `extra={...}` are
+  appended as key=value pairs or JSON keys.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+ROOT_LOGGER = 'fondant'
+REDACTED = '[redacted]'
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_SENSITIVE_KEY = re.compile(r'token|secret|password|passwd|api_key|authorization|signature', re.I)
+_REDACTIONS = (
+    # Stripe keys and webhook secrets: keep the kind, drop the secret part
+    (re.compile(r'\b((?:sk|pk|rk)_(?:test|live)|whsec)_[A-Za-z0-9]+'), r'\1_' + REDACTED),
+    (re.compile(r'\b(Bearer)\s+[^\s,;"\']+', re.I), r'\1 ' + REDACTED),
+    (re.compile(r'\b(token|secret|password|passwd|api_key|signature)(["\']?\s*[=:]\s*["\']?)[^\s&,;"\']+', re.I),
+     r'\1\2' + REDACTED),
+)
+
+
+def redact(text):
+    """Mask secrets and tokens in a log message"""
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def fingerprint(secret):
+    """Identify a secret in logs without revealing it: its kind prefix and a short hash"""
+    kind = re.match(r'((?:sk|pk|rk)_(?:test|live)|whsec)_', secret)
+    digest = hashlib.sha256(secret.encode('utf-8')).hexdigest()[:8]
+    return f"{kind.group(1) if kind else 'secret'}:{digest}"
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class RedactingFilter(logging.Filter):
+    """Render the message once, redact it and any sensitive extra fields, and sample DEBUG"""
+
+    def __init__(self, debug_sample_rate=LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.msg = redact(record.getMessage())
+        record.args = None
+        for key, value in _extra_fields(record).items():
+            if _SENSITIVE_KEY.search(key):
+                setattr(record, key, REDACTED)
+            elif isinstance(value, str):
+                setattr(record, key, redact(value))
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """`time LEVEL logger: message key=value ...`"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value!r}' if isinstance(value, str) and ' ' in value else f'{key}={value}'
+                                   for key, value in fields.items())
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when full and restarts its listener after fork"""
+
+    def __init__(self, target, maxsize=LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked (gunicorn --preload): the parent's listener thread is gone
+                self.queue = queue.Queue(self.queue.maxsize)
+            self._listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Tracebacks are only formatted here, after RedactingFilter has run
+        record = super().prepare(record)
+        if record.msg:
+            record.msg = record.message = redact(record.msg)
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+    def stats(self):
+        return {'queued': self.queue.qsize(), 'maxsize': self.queue.maxsize, 'dropped': self.dropped}
+
+
+_handler = None
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in spec.split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """Install the queue handler on the "fondant" logger once per process; returns it"""
+    global _handler
+    if _handler is not None:
+        return _handler
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JSONFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+    handler = AsyncQueueHandler(stream)
+    handler.addFilter(RedactingFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(handler)
+    root.propagate = False
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(f'{ROOT_LOGGER}.{name}').setLevel(level)
+
+    atexit.register(handler.stop)
+    _handler = handler
+    return handler
+
+
+def get_logger(name):
+    """Logger for a module, e.g. get_logger(__name__) -> "fondant.app" """
+    return logging.getLogger(f'{ROOT_LOGGER}.{name}')
+
+
+def queue_stats():
+    return _handler.stats() if _handler is not None else {'queued': 0, 'maxsize': 0, 'dropped': 0}
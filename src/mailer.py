@@ -0,0 +1,232 @@
+"""
+Outbox for outgoing email.
+
+Request handlers only insert a row into `email_outbox` and return. A single
+background sender owns one authenticated SMTP connection, reuses it across
+messages (checking it with NOOP after idle periods), sends the outbox in
+batches and retries failures with exponential backoff. A message that keeps
+failing is parked after EMAIL_MAX_ATTEMPTS tries with its last error.
+
+Where the outbox cannot be written (e.g. a read-only deploy), send_email()
+delivers a message synchronously on its own connection instead.
+
+Point EMAIL_HOST/EMAIL_PORT at a local stand-in such as aiosmtpd and set
+EMAIL_USE_TLS=False to exercise the sender without a real mail server.
+
+smtplib and the email package are only imported once there is a message to
+send, so they stay off the web process's start-up path.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from db import pool
+from log import get_logger
+from metrics import timed
+
+log = get_logger(__name__)
+
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 20))
+EMAIL_POLL_SECONDS = float(os.getenv('EMAIL_POLL_SECONDS', 10))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 6))
+EMAIL_IDLE_SECONDS = float(os.getenv('EMAIL_IDLE_SECONDS', 60))
+# Start the sender with the app (long-running servers), so messages left in the
+# outbox by an earlier process go out without waiting for a new one; off on
+# serverless, where cold starts should not open the database
+EMAIL_AUTOSTART = os.getenv('EMAIL_AUTOSTART', 'True') == 'True'
+
+
+def smtp_settings():
+    return {
+        'host': os.getenv('EMAIL_HOST', 'smtp.gmail.com'),
+        'port': int(os.getenv('EMAIL_PORT', 587)),
+        'user': os.getenv('EMAIL_USER'),
+        'password': os.getenv('EMAIL_PASSWORD'),
+        'use_tls': os.getenv('EMAIL_USE_TLS', 'True') == 'True',
+    }
+
+
+def open_smtp():
+    """A new SMTP connection, with STARTTLS and login as configured"""
+    import smtplib
+
+    settings = smtp_settings()
+    smtp = smtplib.SMTP(settings['host'], settings['port'], timeout=30)
+    if settings['use_tls']:
+        smtp.starttls()
+    if settings['user'] and settings['password']:
+        smtp.login(settings['user'], settings['password'])
+    return smtp
+
+
+def build_message(sender, recipient, subject, body):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def send_email(sender, recipient, subject, body):
+    """Send one message now on a connection of its own (for when the outbox is unavailable)"""
+    with timed('smtp'):
+        with open_smtp() as smtp:
+            smtp.send_message(build_message(sender, recipient, subject, body))
+
+
+def enqueue_email(db, sender, recipient, subject, body):
+    """Store a message for the background sender; returns its outbox id"""
+    cursor = db.execute(
+        'INSERT INTO email_outbox (sender, recipient, subject, body) VALUES (?, ?, ?, ?)',
+        (sender, recipient, subject, body)
+    )
+    db.commit()
+    return cursor.lastrowid
+
+
+class MailSender:
+    """Background thread draining email_outbox over one reused SMTP connection"""
+
+    def __init__(self, pool, batch_size=EMAIL_BATCH_SIZE, poll_seconds=EMAIL_POLL_SECONDS):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._started_pid = None
+        self._smtp = None
+        self._last_used = 0
+        self.sent = 0
+        self.failed = 0
+        self.connections = 0
+
+    def start(self):
+        """Start the sender thread once per process"""
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            self._smtp = None
+            threading.Thread(target=self._run, name='mail-sender', daemon=True).start()
+        self._wakeup.set()
+
+    def notify(self):
+        """Wake the sender after a message was queued"""
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            try:
+                while self.send_batch() == self.batch_size:
+                    pass
+            except sqlite3.Error as e:
+                log.error('Error reading email outbox: %s', e)
+            if self._smtp is not None and time.monotonic() - self._last_used > EMAIL_IDLE_SECONDS:
+                self._disconnect()
+
+    def _connection(self):
+        """Open (or reuse) the pooled, authenticated SMTP connection"""
+        import smtplib
+
+        if self._smtp is not None and time.monotonic() - self._last_used > EMAIL_IDLE_SECONDS / 2:
+            try:
+                self._smtp.noop()
+            except smtplib.SMTPException:
+                self._disconnect()
+        if self._smtp is None:
+            self._smtp = open_smtp()
+            self.connections += 1
+        return self._smtp
+
+    def _disconnect(self):
+        import smtplib
+
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+
+    def _send(self, row):
+        import smtplib
+
+        msg = build_message(row['sender'], row['recipient'], row['subject'], row['body'])
+        with timed('smtp'):
+            try:
+                self._connection().send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the idle connection; retry once on a fresh one
+                self._disconnect()
+                self._connection().send_message(msg)
+        self._last_used = time.monotonic()
+
+    def send_batch(self):
+        """Send up to batch_size due messages; returns how many were attempted"""
+        db = self.pool.acquire()
+        try:
+            rows = db.execute(
+                '''
+                SELECT id, sender, recipient, subject, body, attempts FROM email_outbox
+                WHERE sent_at IS NULL AND failed_at IS NULL
+                  AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP)
+                ORDER BY id
+                LIMIT ?
+                ''',
+                (self.batch_size,)
+            ).fetchall()
+
+            if rows:
+                import smtplib
+            for row in rows:
+                try:
+                    self._send(row)
+                except (smtplib.SMTPException, OSError) as e:
+                    self._disconnect()
+                    give_up = row['attempts'] + 1 >= EMAIL_MAX_ATTEMPTS
+                    db.execute(
+                        '''
+                        UPDATE email_outbox
+                        SET attempts = attempts + 1, last_error = ?,
+                            next_attempt_at = datetime('now', ?),
+                            failed_at = CASE WHEN ? THEN CURRENT_TIMESTAMP END
+                        WHERE id = ?
+                        ''',
+                        (str(e), f"+{30 * 2 ** row['attempts']} seconds", give_up, row['id'])
+                    )
+                    self.failed += 1
+                    log.warning('Error sending email %s: %s', row['id'], e)
+                else:
+                    db.execute(
+                        'UPDATE email_outbox SET sent_at = CURRENT_TIMESTAMP, attempts = attempts + 1 WHERE id = ?',
+                        (row['id'],)
+                    )
+                    self.sent += 1
+                db.commit()
+            return len(rows)
+        finally:
+            self.pool.release(db)
+
+    def stats(self):
+        return {
+            'running': self._started_pid == os.getpid(),
+            'connected': self._smtp is not None,
+            'connections': self.connections,
+            'sent': self.sent,
+            'failed': self.failed,
+        }
+
+
+# Background sender for queued contact-form email
+mail_sender = MailSender(pool)
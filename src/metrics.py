@@ -0,0 +1,301 @@
+"""
+Request timing metrics in Prometheus text format, and sampled profiles of
+slow requests.
+
+Collection is off unless METRICS_ENABLED=True. When on, every request's
+wall time goes into a per-route latency histogram, and the time it spent in
+each hot-path component is summed per route:
+
+    db        statement execution on pooled connections (get_db() and
+              background workers); fetching large result sets is not included
+    template  render_template() calls
+    catalog   catalog file reloads
+    stripe    Stripe API calls, including network retries
+    smtp      sending queued mail (background worker, so store-wide only)
+
+Components can overlap (a catalog reload inside a template render counts
+for both). Component time spent outside a request (background workers) only
+shows up in the store-wide totals. Everything is per process.
+
+With PROFILE_SAMPLE_RATE > 0, that fraction of requests runs under cProfile
+(one at a time per process) and requests slower than PROFILE_SLOW_MS have
+their stats dumped to PROFILE_DIR for `python -m pstats` or snakeviz.
+"""
+
+import bisect
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import before_render_template, g, request, template_rendered
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 500))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COMPONENTS = ('db', 'template', 'catalog', 'stripe', 'smtp')
+
+# component -> [calls, seconds] for the request running in this context
+_breakdown = ContextVar('metrics_breakdown', default=None)
+_profile_lock = threading.Lock()
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts[i] holds observations <= buckets[i] (last is +Inf)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    """Per-process request latencies and component time, guarded by one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}      # (route, method) -> Histogram
+        self.responses = {}    # (route, method, status) -> count
+        self.route_components = {}  # (route, component) -> [calls, seconds]
+        self.components = {component: [0, 0.0] for component in COMPONENTS}
+        self.profiles = 0
+
+    def observe_component(self, component, seconds, calls=1):
+        with self._lock:
+            totals = self.components[component]
+            totals[0] += calls
+            totals[1] += seconds
+
+    def observe_request(self, route, method, status, seconds, breakdown):
+        with self._lock:
+            histogram = self.latency.get((route, method))
+            if histogram is None:
+                histogram = self.latency[(route, method)] = Histogram()
+            histogram.observe(seconds)
+            key = (route, method, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+            for component, (calls, spent) in breakdown.items():
+                if not calls:
+                    continue
+                totals = self.components[component]
+                totals[0] += calls
+                totals[1] += spent
+                route_totals = self.route_components.setdefault((route, component), [0, 0.0])
+                route_totals[0] += calls
+                route_totals[1] += spent
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        with self._lock:
+            latency = {key: (list(h.counts), h.sum) for key, h in self.latency.items()}
+            responses = dict(self.responses)
+            route_components = {key: tuple(value) for key, value in self.route_components.items()}
+            components = {key: tuple(value) for key, value in self.components.items()}
+            profiles = self.profiles
+
+        lines = [
+            '# HELP fondant_request_duration_seconds Request latency by route.',
+            '# TYPE fondant_request_duration_seconds histogram',
+        ]
+        for (route, method), (counts, total) in sorted(latency.items()):
+            labels = f'route="{_escape(route)}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'fondant_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'fondant_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'fondant_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+        lines += [
+            '# HELP fondant_requests_total Responses by route and status code.',
+            '# TYPE fondant_requests_total counter',
+        ]
+        for (route, method, status), count in sorted(responses.items()):
+            lines.append(f'fondant_requests_total{{route="{_escape(route)}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP fondant_request_component_seconds_total Time requests spent in each component, by route.',
+            '# TYPE fondant_request_component_seconds_total counter',
+        ]
+        for (route, component), (_, spent) in sorted(route_components.items()):
+            lines.append(f'fondant_request_component_seconds_total{{route="{_escape(route)}",component="{component}"}} {spent:.6f}')
+        lines += [
+            '# HELP fondant_request_component_calls_total Component calls made by requests, by route.',
+            '# TYPE fondant_request_component_calls_total counter',
+        ]
+        for (route, component), (calls, _) in sorted(route_components.items()):
+            lines.append(f'fondant_request_component_calls_total{{route="{_escape(route)}",component="{component}"}} {calls}')
+
+        lines += [
+            '# HELP fondant_component_seconds_total Time spent in each component, including background workers.',
+            '# TYPE fondant_component_seconds_total counter',
+        ]
+        for component, (_, spent) in components.items():
+            lines.append(f'fondant_component_seconds_total{{component="{component}"}} {spent:.6f}')
+        lines += [
+            '# HELP fondant_component_calls_total Calls into each component, including background workers.',
+            '# TYPE fondant_component_calls_total counter',
+        ]
+        for component, (calls, _) in components.items():
+            lines.append(f'fondant_component_calls_total{{component="{component}"}} {calls}')
+
+        lines += [
+            '# HELP fondant_slow_request_profiles_total cProfile dumps written for slow requests.',
+            '# TYPE fondant_slow_request_profiles_total counter',
+            f'fondant_slow_request_profiles_total {profiles}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_metrics = RequestMetrics()
+
+
+def record(component, seconds):
+    """Add time spent in a component to the current request (or the store-wide totals)"""
+    breakdown = _breakdown.get()
+    if breakdown is None:
+        request_metrics.observe_component(component, seconds)
+    else:
+        totals = breakdown[component]
+        totals[0] += 1
+        totals[1] += seconds
+
+
+@contextmanager
+def timed(component):
+    """Time the block as `component`; a no-op unless METRICS_ENABLED"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(component, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that reports statement execution time as 'db'"""
+
+    def execute(self, sql, parameters=(), /):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record('db', time.perf_counter() - start)
+
+    def executemany(self, sql, parameters, /):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            record('db', time.perf_counter() - start)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            record('db', time.perf_counter() - start)
+
+
+def _template_started(sender, template, context, **extra):
+    g.setdefault('_metrics_templates', []).append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    starts = g.get('_metrics_templates')
+    if starts:
+        record('template', time.perf_counter() - starts.pop())
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()
+    g._metrics_token = _breakdown.set({component: [0, 0.0] for component in COMPONENTS})
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE and _profile_lock.acquire(blocking=False):
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            _profile_lock.release()
+            return
+        g._metrics_profiler = profiler
+
+
+def _stop_profiler():
+    profiler = g.pop('_metrics_profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+    return profiler
+
+
+def _dump_profile(profiler, seconds):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{int(seconds * 1000)}ms.prof"
+    path = os.path.join(PROFILE_DIR, name)
+    profiler.dump_stats(path)
+    with request_metrics._lock:
+        request_metrics.profiles += 1
+    log.info('Slow request %s %s took %.0f ms; profile written to %s', request.method, request.path, seconds * 1000, path)
+
+
+def _finish_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return response
+    seconds = time.perf_counter() - start
+    profiler = _stop_profiler()
+    if profiler is not None and seconds * 1000 >= PROFILE_SLOW_MS:
+        try:
+            _dump_profile(profiler, seconds)
+        except OSError as e:
+            log.warning('Could not write request profile: %s', e)
+    breakdown = _breakdown.get()
+    _breakdown.reset(g.pop('_metrics_token'))
+    request_metrics.observe_request(
+        request.endpoint or 'unmatched', request.method, response.status_code, seconds, breakdown
+    )
+    return response
+
+
+def _abandon_request(exc=None):
+    # after_request did not run (e.g. an error while finishing the response)
+    _stop_profiler()
+    token = g.pop('_metrics_token', None)
+    if token is not None:
+        _breakdown.reset(token)
+
+
+def init_app(app, pool):
+    """Install the timing hooks on app and time pool's connections; no-op unless METRICS_ENABLED"""
+    if not METRICS_ENABLED:
+        return
+    pool.factory = TimedConnection
+    pool.close_all()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_abandon_request)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
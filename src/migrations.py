@@ -0,0 +1,213 @@
+"""
+Versioned schema migrations for the shop database.
+
+Each migration is a (version, description, statements) entry. The applied
+version is stored in SQLite's PRAGMA user_version, so startup only runs the
+migrations a database has not seen yet and request handlers never issue DDL.
+Every migration runs in its own BEGIN IMMEDIATE transaction, which also makes
+concurrent worker startups safe: the second worker waits, re-reads the
+version and finds nothing left to do.
+"""
+
+import sqlite3
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+MIGRATIONS = [
+    (1, 'users and orders tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            first_name TEXT,
+            last_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            product_name TEXT NOT NULL,
+            product_price REAL NOT NULL,
+            stripe_session_id TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+    ]),
+    (2, 'reviews table', [
+        '''
+        CREATE TABLE IF NOT EXISTS reviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_name TEXT NOT NULL,
+            user_email TEXT NOT NULL,
+            rating INTEGER NOT NULL CHECK(rating >= 1 AND rating <= 5),
+            review_text TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            approved BOOLEAN DEFAULT 0
+        )
+        ''',
+    ]),
+    (3, 'indexes for webhook, order history and review listing queries', [
+        # Webhook lookup: SELECT id FROM orders WHERE stripe_session_id = ?
+        'CREATE INDEX IF NOT EXISTS idx_orders_stripe_session ON orders (stripe_session_id)',
+        # Per-user order history, newest first
+        'CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at)',
+        # Approved reviews, newest first
+        'CREATE INDEX IF NOT EXISTS idx_reviews_approved_created ON reviews (approved, created_at)',
+    ]),
+    (4, 'stripe_events webhook inbox', [
+        '''
+        CREATE TABLE IF NOT EXISTS stripe_events (
+            id TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP,
+            last_error TEXT
+        )
+        ''',
+        # Workers only ever scan the unprocessed tail
+        'CREATE INDEX IF NOT EXISTS idx_stripe_events_pending ON stripe_events (received_at) WHERE processed_at IS NULL',
+    ]),
+    (5, 'stripe_prices cache of Stripe Product/Price ids', [
+        '''
+        CREATE TABLE IF NOT EXISTS stripe_prices (
+            product_key TEXT NOT NULL,
+            variant TEXT NOT NULL DEFAULT '',
+            unit_amount INTEGER NOT NULL,
+            currency TEXT NOT NULL DEFAULT 'usd',
+            stripe_product_id TEXT NOT NULL,
+            stripe_price_id TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (product_key, variant, unit_amount, currency)
+        )
+        ''',
+    ]),
+    (6, 'email_outbox for background contact-form mail', [
+        '''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT NOT NULL,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP,
+            sent_at TIMESTAMP,
+            failed_at TIMESTAMP,
+            last_error TEXT
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_email_outbox_pending ON email_outbox (id) WHERE sent_at IS NULL AND failed_at IS NULL',
+    ]),
+    (7, 'server-side carts', [
+        '''
+        CREATE TABLE IF NOT EXISTS carts (
+            id TEXT PRIMARY KEY,
+            items TEXT NOT NULL,
+            revision INTEGER NOT NULL DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (8, 'order_items and integer-cent order totals', [
+        'ALTER TABLE orders ADD COLUMN total_cents INTEGER',
+        'ALTER TABLE orders ADD COLUMN customer_uid TEXT',
+        'ALTER TABLE orders ADD COLUMN customer_email TEXT',
+        'ALTER TABLE orders ADD COLUMN customer_name TEXT',
+        'UPDATE orders SET total_cents = CAST(ROUND(product_price * 100) AS INTEGER) WHERE total_cents IS NULL',
+        '''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL,
+            product_id INTEGER,
+            product_name TEXT NOT NULL,
+            variant TEXT NOT NULL DEFAULT '',
+            color TEXT NOT NULL DEFAULT '',
+            unit_cents INTEGER NOT NULL,
+            quantity INTEGER NOT NULL CHECK(quantity > 0),
+            FOREIGN KEY (order_id) REFERENCES orders (id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id)',
+        # Per-product sales reporting
+        'CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id)',
+        # Order history for storefront (Firebase) customers, newest first
+        'CREATE INDEX IF NOT EXISTS idx_orders_customer_created ON orders (customer_uid, created_at)',
+    ]),
+    (9, 'created_at indexes for incremental exports', [
+        # /admin/export/...?since= range scans in created_at order
+        'CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_reviews_created ON reviews (created_at)',
+    ]),
+    (10, 'per-product reviews and product_rating_summary', [
+        'ALTER TABLE reviews ADD COLUMN product_id INTEGER',
+        # Keyset pages of approved reviews, store-wide and per product
+        'CREATE INDEX IF NOT EXISTS idx_reviews_approved_id ON reviews (approved, id)',
+        'CREATE INDEX IF NOT EXISTS idx_reviews_product_approved_id ON reviews (product_id, approved, id)',
+        '''
+        CREATE TABLE IF NOT EXISTS product_rating_summary (
+            product_id INTEGER PRIMARY KEY,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            stars_1 INTEGER NOT NULL DEFAULT 0,
+            stars_2 INTEGER NOT NULL DEFAULT 0,
+            stars_3 INTEGER NOT NULL DEFAULT 0,
+            stars_4 INTEGER NOT NULL DEFAULT 0,
+            stars_5 INTEGER NOT NULL DEFAULT 0,
+            revision INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Store-wide row (product_id -1) from reviews approved so far
+        '''
+        INSERT INTO product_rating_summary
+            (product_id, review_count, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT -1, COUNT(*), TOTAL(rating), TOTAL(rating = 1), TOTAL(rating = 2), TOTAL(rating = 3),
+               TOTAL(rating = 4), TOTAL(rating = 5)
+        FROM reviews WHERE approved = 1
+        ''',
+    ]),
+]
+
+
+def current_version(db):
+    return db.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(db_path):
+    """Apply pending migrations; returns the list of versions applied"""
+    db = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    applied = []
+    try:
+        for version, description, statements in MIGRATIONS:
+            if current_version(db) >= version:
+                continue
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                # Another process may have applied it while we waited for the lock
+                if current_version(db) >= version:
+                    db.execute('ROLLBACK')
+                    continue
+                for statement in statements:
+                    db.execute(statement)
+                db.execute(f'PRAGMA user_version = {int(version)}')
+                db.execute('COMMIT')
+            except sqlite3.Error:
+                db.execute('ROLLBACK')
+                raise
+            log.info('Applied migration %s: %s', version, description)
+            applied.append(version)
+    finally:
+        db.close()
+    return applied
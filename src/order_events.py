@@ -0,0 +1,77 @@
+"""
+In-process pub/sub for order status changes.
+
+The webhook inbox publishes every order transition it applies, and each
+/api/order-status/<id>/stream connection subscribes to its order, so the
+payment page gets one pushed event instead of polling every second.
+Subscribers on another worker process only see changes that worker applied,
+so the stream also re-reads the order's status on every heartbeat.
+
+ORDER_STREAM_HEARTBEAT_SECONDS sets the heartbeat (and re-check) interval,
+ORDER_STREAM_IDLE_SECONDS how long a stream may stay open without a status
+change, and ORDER_STREAM_MAX_SUBSCRIBERS caps concurrent streams per process.
+"""
+
+import os
+import queue
+import threading
+
+ORDER_STREAM_HEARTBEAT_SECONDS = float(os.getenv('ORDER_STREAM_HEARTBEAT_SECONDS', 15))
+ORDER_STREAM_IDLE_SECONDS = float(os.getenv('ORDER_STREAM_IDLE_SECONDS', 120))
+ORDER_STREAM_MAX_SUBSCRIBERS = int(os.getenv('ORDER_STREAM_MAX_SUBSCRIBERS', 200))
+
+# Statuses after which nothing else will happen to an order
+FINAL_STATUSES = frozenset(('completed', 'failed', 'expired'))
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class OrderStatusBroker:
+    """order id -> subscriber queues; publish() never blocks the publisher"""
+
+    def __init__(self, max_subscribers=ORDER_STREAM_MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, order_id):
+        """Queue that receives the order's new statuses; release it with unsubscribe()"""
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers(f'{self._count} order status streams already open')
+            subscriber = queue.SimpleQueue()
+            self._subscribers.setdefault(order_id, set()).add(subscriber)
+            self._count += 1
+        return subscriber
+
+    def unsubscribe(self, order_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(order_id)
+            if subscribers is None or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[order_id]
+            self._count -= 1
+
+    def publish(self, order_id, status):
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(order_id, ()))
+        for subscriber in subscribers:
+            subscriber.put(status)
+        self.published += 1
+
+    def stats(self):
+        return {
+            'subscribers': self._count,
+            'orders': len(self._subscribers),
+            'max_subscribers': self.max_subscribers,
+            'published': self.published,
+        }
+
+
+order_events = OrderStatusBroker()
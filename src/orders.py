@@ -0,0 +1,54 @@
+"""
+Local order records.
+
+Every Stripe Checkout session is recorded as one `orders` row plus one
+`order_items` row per line, with all amounts in integer cents, so order
+history and reporting can be served from indexed SQLite rows instead of the
+Stripe dashboard. The webhook inbox later moves the order's status along by
+its stripe_session_id.
+"""
+
+ORDER_ITEM_COLUMNS = ('product_id', 'product_name', 'variant', 'color', 'unit_cents', 'quantity')
+
+
+def create_order(db, stripe_session_id, customer, order_name, items, user_id=None):
+    """Insert an order and all of its items in one transaction; returns the order id
+
+    customer is a dict with uid/email/name; items are dicts with the
+    ORDER_ITEM_COLUMNS keys (product_id may be None for ad-hoc products).
+    """
+    total_cents = sum(item['unit_cents'] * item['quantity'] for item in items)
+    try:
+        cursor = db.execute(
+            '''
+            INSERT INTO orders (user_id, product_name, product_price, total_cents, stripe_session_id,
+                                customer_uid, customer_email, customer_name)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (user_id, order_name, total_cents / 100, total_cents, stripe_session_id,
+             customer.get('uid'), customer.get('email'), customer.get('name'))
+        )
+        order_id = cursor.lastrowid
+        db.executemany(
+            '''
+            INSERT INTO order_items (order_id, product_id, product_name, variant, color, unit_cents, quantity)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''',
+            [(order_id, *(item[column] for column in ORDER_ITEM_COLUMNS)) for item in items]
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return order_id
+
+
+def order_items(db, order_id):
+    return db.execute(
+        '''
+        SELECT product_id, product_name, variant, color, unit_cents, quantity,
+               unit_cents * quantity AS line_cents
+        FROM order_items WHERE order_id = ? ORDER BY id
+        ''',
+        (order_id,)
+    ).fetchall()
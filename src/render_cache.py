@@ -0,0 +1,135 @@
+"""
+Rendered-page and fragment cache.
+
+Catalog and content pages only change when the catalog (or the code) does,
+so their rendered HTML is kept in an LRU cache bounded by a byte budget.
+Keys include the route, its arguments and the catalog version, plus the
+versions of any other content the route shows (e.g. reviews); the whole
+cache is also cleared whenever the catalog reloads. Only routes that list a
+version source pay for checking it, so catalog-only pages never open the
+database.
+
+Only anonymous requests with no pending flash messages are served whole
+pages from the cache. Everything else still renders, but can reuse cached
+fragments such as product cards. Per-user bits (the cart badge) are filled
+in client-side and never end up in cached HTML.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request, session
+from markupsafe import Markup
+
+from catalog import catalog
+
+
+class RenderCache:
+    """Thread-safe LRU of rendered HTML with a total byte budget"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        """Store encoded HTML; entries larger than the whole budget are skipped"""
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self, *_):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+render_cache = RenderCache(int(os.getenv('RENDER_CACHE_BYTES', 8 * 1024 * 1024)))
+
+# A reload changes the catalog version anyway; clearing frees the memory now
+catalog.add_listener(render_cache.clear)
+
+def content_version(versions=()):
+    """Catalog version plus source() for each extra content version a route depends on"""
+    if not versions:
+        return catalog.version
+    return '|'.join([catalog.version] + [source() for source in versions])
+
+
+def is_anonymous_request():
+    """True when nothing user-specific can end up in the rendered page"""
+    return 'user_id' not in session and '_flashes' not in session
+
+
+def cached_page(view=None, versions=()):
+    """Serve anonymous GETs of a view from the render cache
+
+    Use as @cached_page, or @cached_page(versions=[source, ...]) when the page
+    also shows content that changes independently of the catalog.
+    """
+    if view is None:
+        return lambda view: cached_page(view, versions)
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or not is_anonymous_request():
+            return view(*args, **kwargs)
+
+        key = ('page', request.endpoint, tuple(sorted(kwargs.items())),
+               tuple(sorted(request.args.items(multi=True))), content_version(versions))
+        body = render_cache.get(key)
+        if body is not None:
+            return Response(body, mimetype='text/html')
+
+        rv = view(*args, **kwargs)
+        # Only plain rendered templates are cached; redirects and custom
+        # responses pass through untouched
+        if isinstance(rv, str):
+            render_cache.put(key, rv.encode('utf-8'))
+        return rv
+    return wrapper
+
+
+def cached_fragment(name, key, render):
+    """Return render() as Markup, cached under (name, key, content version)"""
+    cache_key = ('fragment', name, key, content_version())
+    body = render_cache.get(cache_key)
+    if body is None:
+        body = render().encode('utf-8')
+        render_cache.put(cache_key, body)
+    return Markup(body.decode('utf-8'))
@@ -0,0 +1,181 @@
+"""
+Customer reviews: submission, moderation, keyset-paginated listing and
+precomputed rating aggregates.
+
+Reviews start pending (approved = 0) and are approved (1) or rejected (-1)
+by a moderator. Approving a review, or rejecting one that was approved,
+adjusts its product's row and the store-wide row (product_id = -1) in
+`product_rating_summary` in the same transaction. Product pages therefore
+read count, average and histogram with one primary-key lookup instead of
+aggregating the reviews table.
+
+The store-wide row's revision also serves as a cache version, so cached
+pages showing reviews are invalidated when moderation changes them.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from db import pool
+
+PENDING, APPROVED, REJECTED = 0, 1, -1
+ALL_PRODUCTS = -1
+
+REVIEWS_PAGE_SIZE = int(os.getenv('REVIEWS_PAGE_SIZE', 12))
+REVIEWS_VERSION_TTL = float(os.getenv('REVIEWS_VERSION_TTL', 5))
+
+STAR_COLUMNS = {rating: f'stars_{rating}' for rating in range(1, 6)}
+
+
+def submit_review(db, user_name, user_email, rating, review_text, product_id=None):
+    """Store a pending review; returns its id"""
+    cursor = db.execute(
+        '''
+        INSERT INTO reviews (user_name, user_email, rating, review_text, product_id, approved)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''',
+        (user_name, user_email, rating, review_text, product_id, PENDING)
+    )
+    db.commit()
+    return cursor.lastrowid
+
+
+def approved_reviews(db, product_id=None, before=None, limit=REVIEWS_PAGE_SIZE):
+    """Newest approved reviews with id < before; returns (rows, next_cursor)"""
+    conditions = ['approved = ?']
+    params = [APPROVED]
+    if product_id is not None:
+        conditions.append('product_id = ?')
+        params.append(product_id)
+    if before is not None:
+        conditions.append('id < ?')
+        params.append(before)
+    rows = db.execute(
+        f'''
+        SELECT id, product_id, user_name, rating, review_text, created_at FROM reviews
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id DESC
+        LIMIT ?
+        ''',
+        (*params, limit + 1)
+    ).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (rows[-1]['id'] if has_more else None)
+
+
+def pending_reviews(db, after=None, limit=50):
+    """Oldest pending reviews with id > after, for the moderation queue"""
+    return db.execute(
+        '''
+        SELECT id, product_id, user_name, user_email, rating, review_text, created_at FROM reviews
+        WHERE approved = ? AND id > ?
+        ORDER BY id
+        LIMIT ?
+        ''',
+        (PENDING, after or 0, limit)
+    ).fetchall()
+
+
+def _adjust_summary(db, product_id, rating, delta):
+    star = STAR_COLUMNS[rating]
+    db.execute(
+        f'''
+        INSERT INTO product_rating_summary (product_id, review_count, rating_sum, {star}, revision, updated_at)
+        VALUES (?, ?, ?, ?, 1, CURRENT_TIMESTAMP)
+        ON CONFLICT (product_id) DO UPDATE SET
+            review_count = review_count + excluded.review_count,
+            rating_sum = rating_sum + excluded.rating_sum,
+            {star} = {star} + excluded.{star},
+            revision = revision + 1,
+            updated_at = CURRENT_TIMESTAMP
+        ''',
+        (product_id, delta, delta * rating, delta)
+    )
+
+
+def moderate_review(db, review_id, approve):
+    """Approve or reject a review, keeping the rating summaries in step.
+
+    Returns the review's new state, or None if there is no such review.
+    """
+    new_state = APPROVED if approve else REJECTED
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        row = db.execute('SELECT approved, rating, product_id FROM reviews WHERE id = ?', (review_id,)).fetchone()
+        if row is None:
+            db.rollback()
+            return None
+        if row['approved'] != new_state:
+            db.execute('UPDATE reviews SET approved = ? WHERE id = ?', (new_state, review_id))
+            delta = 0
+            if new_state == APPROVED:
+                delta = 1
+            elif row['approved'] == APPROVED:
+                delta = -1
+            if delta:
+                _adjust_summary(db, ALL_PRODUCTS, row['rating'], delta)
+                if row['product_id'] is not None:
+                    _adjust_summary(db, row['product_id'], row['rating'], delta)
+        db.commit()
+    except sqlite3.Error:
+        db.rollback()
+        raise
+    return new_state
+
+
+def empty_summary():
+    """Rating summary of a product without approved reviews"""
+    return {'count': 0, 'average': None, 'histogram': {rating: 0 for rating in STAR_COLUMNS}}
+
+
+def rating_summary(db, product_id=ALL_PRODUCTS):
+    """{'count', 'average', 'histogram'} for a product (or the whole store)"""
+    row = db.execute('SELECT * FROM product_rating_summary WHERE product_id = ?', (product_id,)).fetchone()
+    if row is None or not row['review_count']:
+        return empty_summary()
+    return {
+        'count': row['review_count'],
+        'average': round(row['rating_sum'] / row['review_count'], 1),
+        'histogram': {rating: row[column] for rating, column in STAR_COLUMNS.items()},
+    }
+
+
+class ReviewsVersion:
+    """Store-wide summary revision, re-read at most every REVIEWS_VERSION_TTL seconds"""
+
+    def __init__(self, pool, ttl=REVIEWS_VERSION_TTL):
+        self.pool = pool
+        self.ttl = ttl
+        self._revision = 0
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        # Without the database (or its reviews tables) the version stays put
+        row = None
+        try:
+            db = self.pool.acquire()
+            try:
+                row = db.execute(
+                    'SELECT revision FROM product_rating_summary WHERE product_id = ?', (ALL_PRODUCTS,)
+                ).fetchone()
+            finally:
+                self.pool.release(db)
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            if row is not None:
+                self._revision = row[0]
+            self._checked = time.monotonic()
+
+    def __call__(self):
+        if time.monotonic() - self._checked > self.ttl:
+            self.refresh()
+        return f'reviews-{self._revision}'
+
+
+# Cached pages that show reviews change when moderation does
+reviews_version = ReviewsVersion(pool)
@@ -0,0 +1,140 @@
+"""
+Inverted-index product search over the catalog.
+
+The index maps each lowercase title token to the set of product ids whose
+title contains it, plus a price-ordered list of (price_cents, id) pairs for
+range queries. It is built when the catalog first loads and, on every reload,
+updated only for the products whose title or price changed. Updates are
+copy-on-write: a new index object is swapped in, so in-flight queries keep a
+consistent view without locking.
+"""
+
+import re
+from bisect import bisect_left, bisect_right, insort
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+SORT_OPTIONS = ('relevance', 'price_asc', 'price_desc', 'title')
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    return TOKEN_RE.findall(text.lower())
+
+
+def _indexed_fields(product):
+    return (product['title'], product['price_cents'])
+
+
+class SearchIndex:
+    """Immutable token and price index for one catalog snapshot"""
+
+    def __init__(self, postings=None, price_order=None, fields=None, version='empty'):
+        self.postings = postings or {}
+        self.price_order = price_order or []
+        self.fields = fields or {}
+        self.version = version
+
+    @classmethod
+    def build(cls, snapshot):
+        return cls().updated(snapshot)
+
+    def updated(self, snapshot):
+        """Return a new index for snapshot, touching only changed products"""
+        new_fields = {pid: _indexed_fields(p) for pid, p in snapshot.by_id.items()}
+        changed_old = [pid for pid, f in self.fields.items() if new_fields.get(pid) != f]
+        changed_new = [pid for pid, f in new_fields.items() if self.fields.get(pid) != f]
+        if not changed_old and not changed_new:
+            return SearchIndex(self.postings, self.price_order, new_fields, snapshot.version)
+
+        postings = dict(self.postings)
+        price_order = list(self.price_order)
+        touched = {}
+
+        def posting(token):
+            if token not in touched:
+                touched[token] = set(postings.get(token, ()))
+            return touched[token]
+
+        for pid in changed_old:
+            title, price_cents = self.fields[pid]
+            for token in set(tokenize(title)):
+                posting(token).discard(pid)
+            idx = bisect_left(price_order, (price_cents, pid))
+            if idx < len(price_order) and price_order[idx] == (price_cents, pid):
+                del price_order[idx]
+
+        for pid in changed_new:
+            title, price_cents = new_fields[pid]
+            for token in set(tokenize(title)):
+                posting(token).add(pid)
+            insort(price_order, (price_cents, pid))
+
+        for token, ids in touched.items():
+            if ids:
+                postings[token] = frozenset(ids)
+            else:
+                postings.pop(token, None)
+
+        return SearchIndex(postings, price_order, new_fields, snapshot.version)
+
+    def _price_range(self, min_cents, max_cents):
+        lo = 0 if min_cents is None else bisect_left(self.price_order, (min_cents, -1))
+        hi = len(self.price_order) if max_cents is None else bisect_right(self.price_order, (max_cents, float('inf')))
+        return self.price_order[lo:hi]
+
+    def search(self, query='', min_cents=None, max_cents=None, sort='relevance'):
+        """Return matching product ids in the requested order.
+
+        Every query token must appear in the title. Cost is proportional to
+        the smallest posting list (or the price range when there is no text).
+        """
+        tokens = set(tokenize(query or ''))
+        if not tokens:
+            matches = [pid for _, pid in self._price_range(min_cents, max_cents)]
+            if sort == 'price_asc':
+                return matches
+            if sort == 'price_desc':
+                return matches[::-1]
+        else:
+            lists = sorted((self.postings.get(t, frozenset()) for t in tokens), key=len)
+            found = set(lists[0])
+            for ids in lists[1:]:
+                if not found:
+                    break
+                found &= ids
+            matches = []
+            for pid in found:
+                price_cents = self.fields[pid][1]
+                if min_cents is not None and price_cents < min_cents:
+                    continue
+                if max_cents is not None and price_cents > max_cents:
+                    continue
+                matches.append(pid)
+
+        if sort == 'price_asc':
+            matches.sort(key=lambda pid: (self.fields[pid][1], pid))
+        elif sort == 'price_desc':
+            matches.sort(key=lambda pid: (-self.fields[pid][1], pid))
+        elif sort == 'title':
+            matches.sort(key=lambda pid: (self.fields[pid][0].lower(), pid))
+        else:
+            # Catalog order for now; there is no ranking signal beyond a match
+            matches.sort()
+        return matches
+
+
+class ProductSearch:
+    """Holds the live search index and keeps it in step with catalog reloads"""
+
+    def __init__(self):
+        self.index = SearchIndex()
+
+    def on_catalog_reload(self, previous, snapshot):
+        self.index = self.index.updated(snapshot)
+
+    def search(self, *args, **kwargs):
+        return self.index.search(*args, **kwargs)
+
+
+product_search = ProductSearch()
@@ -0,0 +1,42 @@
+"""
+Application settings read from the environment.
+
+Imported first by the app factory, so a local .env file (development only;
+on Vercel the variables are set on the project) is loaded before any other
+module reads its own settings.
+"""
+
+import os
+
+if os.path.exists('.env') or os.path.exists('../.env'):
+    from dotenv import load_dotenv
+    load_dotenv('.env' if os.path.exists('.env') else '../.env')
+
+
+def _unquote(value):
+    """Remove surrounding quotes left in values copied from .env files"""
+    return value.strip().strip("'").strip('"')
+
+
+SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'fallback-secret-key-change-in-production')
+SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'False') == 'True'  # True for HTTPS
+
+# Base URL configuration (change to your domain in production)
+BASE_URL = os.getenv('BASE_URL', 'http://localhost:5000')
+
+STRIPE_SECRET_KEY = _unquote(os.getenv('STRIPE_SECRET_KEY', '')) or None
+
+STRIPE_PUBLISHABLE_KEY = os.getenv('STRIPE_PUBLISHABLE_KEY', 'pk_test_default')
+if STRIPE_PUBLISHABLE_KEY and STRIPE_PUBLISHABLE_KEY != 'pk_test_default':
+    STRIPE_PUBLISHABLE_KEY = _unquote(STRIPE_PUBLISHABLE_KEY)
+
+STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')  # Optional for local testing
+
+# Shared secret for admin/reporting endpoints; they are disabled when unset
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
+# Apply pending migrations when a process first opens the database
+RUN_DB_MIGRATIONS = os.getenv('RUN_DB_MIGRATIONS', 'True') == 'True'
+
+# Long-running workers (gunicorn) can hot-reload the catalog in the background
+CATALOG_WATCH = os.getenv('CATALOG_WATCH', 'False') == 'True'
@@ -0,0 +1,70 @@
+// Batched cart updates for the storefront pages.
+// Operations queued within a short window (e.g. several quantity clicks, or
+// adding a few products in a row) are sent together as one
+// /api/cart/batch request, which applies them atomically and returns the
+// new cart, count and subtotal. The window starts with the first queued
+// operation and is not extended by later ones, so steady clicking still
+// flushes every BATCH_DELAY_MS.
+
+(function () {
+    const BATCH_DELAY_MS = 150;
+    let queue = [];
+    let timer = null;
+
+    function setBadge(count) {
+        const badge = document.getElementById('cart-badge');
+        if (badge) {
+            badge.textContent = count;
+            badge.style.display = count > 0 ? 'inline-block' : 'none';
+        }
+    }
+
+    async function send(entries) {
+        const operations = entries.flatMap(entry => entry.operations);
+        try {
+            const response = await fetch('/api/cart/batch', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({ operations: operations })
+            });
+            const data = await response.json();
+            if (!data.success && typeof data.index === 'number' && entries.length > 1) {
+                // Nothing was applied; fail only the call that queued the
+                // invalid operation (e.g. a line removed meanwhile) and
+                // resend the others
+                let end = 0;
+                const failed = entries.find(entry => (end += entry.operations.length) > data.index);
+                if (failed) {
+                    failed.resolve(data);
+                    return send(entries.filter(entry => entry !== failed));
+                }
+            }
+            if (data.success) {
+                setBadge(data.cart_count);
+            }
+            entries.forEach(entry => entry.resolve(data));
+        } catch (error) {
+            entries.forEach(entry => entry.reject(error));
+        }
+    }
+
+    function flush() {
+        const entries = queue;
+        queue = [];
+        timer = null;
+        return send(entries);
+    }
+
+    // Queue operations like {op: 'add', product_id, variant, color, quantity};
+    // resolves with the batch response once they have been applied
+    function batch(operations) {
+        return new Promise((resolve, reject) => {
+            queue.push({ operations, resolve, reject });
+            if (timer === null) {
+                timer = setTimeout(flush, BATCH_DELAY_MS);
+            }
+        });
+    }
+
+    window.cartApi = { batch: batch, setBadge: setBadge };
+})();
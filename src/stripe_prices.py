@@ -0,0 +1,197 @@
+"""
+Stripe client setup and a local cache of Stripe Price ids.
+
+Checkout used to send inline `price_data` for every line item. Instead, each
+(product, variant, amount) combination is created in Stripe once as a
+Product + Price, its price id is kept in the `stripe_prices` table (with an
+in-process dict in front of it), and checkout line items just reference
+`{'price': price_id, 'quantity': n}`. Products are keyed by a hash of their
+title and link rather than their id: JSON catalog ids are list positions,
+which shift when a product is deleted. `manage_products.py sync-stripe`
+pre-creates prices for the whole catalog; anything missing is created
+lazily on first checkout, and inline price_data remains the fallback if
+Stripe cannot be reached.
+
+All Stripe calls share one requests.Session with keep-alive, so checkout
+reuses warm TLS connections. STRIPE_API_BASE points the SDK at a local
+fake Stripe server (e.g. stripe-mock) for tests and benchmarks.
+
+Importing the Stripe SDK takes most of a second, so it is only imported
+(and configured) by stripe_api() on first use. Cold starts that serve
+pages which never talk to Stripe skip it entirely.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from db import pool
+from log import get_logger
+from metrics import timed
+
+log = get_logger(__name__)
+
+CURRENCY = 'usd'
+STRIPE_TIMEOUT = int(os.getenv('STRIPE_TIMEOUT', 30))
+STRIPE_POOL_SIZE = int(os.getenv('STRIPE_POOL_SIZE', 10))
+
+
+_stripe = None
+_api_key = None
+_stripe_lock = threading.Lock()
+
+
+def configure_stripe(api_key):
+    """Set the secret key the SDK is configured with when stripe_api() loads it"""
+    global _api_key
+    _api_key = api_key or None
+    if _stripe is not None:
+        _stripe.api_key = _api_key
+
+
+def stripe_api():
+    """The stripe module, imported and configured on first use"""
+    global _stripe
+    if _stripe is None:
+        with _stripe_lock:
+            if _stripe is None:
+                import stripe
+                stripe.api_key = _api_key
+                configure_http_client(stripe)
+                _stripe = stripe
+    return _stripe
+
+
+def _timed_requests_client(stripe, **kwargs):
+    class TimedRequestsClient(stripe.RequestsClient):
+        """RequestsClient that reports each API call (retries included) as 'stripe' time"""
+
+        def request_with_retries(self, *args, **kwargs):
+            with timed('stripe'):
+                return super().request_with_retries(*args, **kwargs)
+
+    return TimedRequestsClient(**kwargs)
+
+
+def configure_http_client(stripe):
+    """Use one keep-alive HTTP session (and optional fake API base) for all Stripe calls"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=STRIPE_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    stripe.default_http_client = _timed_requests_client(stripe, timeout=STRIPE_TIMEOUT, session=session)
+    stripe.max_network_retries = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', 2))
+
+    api_base = os.getenv('STRIPE_API_BASE')
+    if api_base:
+        stripe.api_base = api_base.rstrip('/')
+
+
+def product_key(product):
+    """Stable identity of a catalog product for the price cache (survives renumbering)"""
+    identity = f"{product['title']}\n{product.get('link', '')}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:24]
+
+
+class StripePriceCache:
+    """(product_key, variant, amount) -> Stripe price id, backed by SQLite"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._prices = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.created = 0
+
+    def _lookup(self, key):
+        db = self.pool.acquire()
+        try:
+            row = db.execute(
+                '''
+                SELECT stripe_price_id FROM stripe_prices
+                WHERE product_key = ? AND variant = ? AND unit_amount = ? AND currency = ?
+                ''',
+                key
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            self.pool.release(db)
+
+    def _create(self, key, name):
+        stripe = stripe_api()
+        product_key, variant, unit_amount, currency = key
+        product = stripe.Product.create(
+            name=name,
+            metadata={'product_key': product_key, 'variant': variant}
+        )
+        price = stripe.Price.create(product=product.id, unit_amount=unit_amount, currency=currency)
+
+        db = self.pool.acquire()
+        try:
+            db.execute(
+                '''
+                INSERT OR IGNORE INTO stripe_prices
+                    (product_key, variant, unit_amount, currency, stripe_product_id, stripe_price_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (*key, product.id, price.id)
+            )
+            db.commit()
+        finally:
+            self.pool.release(db)
+        self.created += 1
+        # If another worker won the race, keep using whichever row was stored first
+        return self._lookup(key) or price.id
+
+    def price_id(self, product_key, variant, unit_amount, name, currency=CURRENCY):
+        """Cached Stripe price id, creating the Product/Price on first use"""
+        key = (str(product_key), variant or '', int(unit_amount), currency)
+        price_id = self._prices.get(key)
+        if price_id:
+            self.hits += 1
+            return price_id
+
+        # The lock only guards the dict; lookups and Stripe calls run unlocked so
+        # one slow creation does not hold up other misses. Two workers creating
+        # the same price at once is settled by _create() keeping the first row.
+        price_id = self._lookup(key) or self._create(key, name)
+        with self._lock:
+            price_id = self._prices.setdefault(key, price_id)
+        return price_id
+
+    def line_item(self, product_key, variant, unit_amount, quantity, name):
+        """Checkout line item by price id, or inline price_data if Stripe price creation fails"""
+        stripe = stripe_api()
+        try:
+            return {'price': self.price_id(product_key, variant, unit_amount, name), 'quantity': quantity}
+        except (stripe.error.StripeError, sqlite3.Error) as e:
+            log.warning('Falling back to inline price_data for %s: %s', name, e)
+            return {
+                'price_data': {
+                    'currency': CURRENCY,
+                    'product_data': {'name': name},
+                    'unit_amount': int(unit_amount),
+                },
+                'quantity': quantity,
+            }
+
+    def sync_catalog(self, products, variants_for):
+        """Pre-create prices for every product/variant; returns the number of prices ensured"""
+        count = 0
+        for product in products:
+            for variant in variants_for(product):
+                unit_amount = product['price_cents'] + int(variant['price_modifier']) * 100
+                self.price_id(product_key(product), variant['name'], unit_amount,
+                              f"{product['title']} - {variant['name']}")
+                count += 1
+        return count
+
+    def stats(self):
+        return {'cached': len(self._prices), 'hits': self.hits, 'created': self.created}
+
+
+# Stripe Price ids for catalog products, so checkout sends price references
+stripe_prices = StripePriceCache(pool)
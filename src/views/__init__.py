@@ -0,0 +1,68 @@
+"""
+Blueprints, one module per area of the shop, registered by factory.create_app().
+
+This package only holds what several blueprints share. It must stay cheap to
+import: the webhook-only function loads it without the catalog or templates.
+"""
+
+import hmac
+import threading
+from functools import wraps
+
+from flask import flash, jsonify, redirect, request, session, url_for
+
+import settings
+
+_storefront_lock = threading.Lock()
+_storefront_ready = False
+
+
+def login_required(f):
+    """Decorator to require login for routes"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            flash('Please log in to access this page.', 'error')
+            return redirect(url_for('auth.login'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def admin_required(f):
+    """Decorator requiring `Authorization: Bearer <ADMIN_TOKEN>` for admin endpoints"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not settings.ADMIN_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+        auth = request.headers.get('Authorization', '')
+        token = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+        if not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def setup_storefront(state=None):
+    """Load the catalog and wire its listeners, once per process
+
+    Blueprints that render catalog content register this with
+    `bp.record_once(setup_storefront)`, so it runs when the first of them is
+    registered and not at all in apps without them.
+    """
+    global _storefront_ready
+    with _storefront_lock:
+        if _storefront_ready:
+            return
+        from catalog import catalog
+        from search import product_search
+
+        # Keep the product search index in step with catalog reloads
+        catalog.add_listener(product_search.on_catalog_reload)
+
+        if settings.CATALOG_WATCH:
+            # Hot-reload in the background instead of checking the file on every request
+            catalog.start_watching()
+        else:
+            # Load at start-up so a cold start pays for it before the first request
+            catalog.snapshot()
+        _storefront_ready = True
@@ -0,0 +1,155 @@
+"""Debug statistics, admin exports, review moderation and Prometheus metrics"""
+
+import os
+
+from flask import Blueprint, Response, jsonify, request
+
+import db as db_pool
+import metrics
+import settings
+from cart_store import cart_store
+from catalog import catalog
+from db import get_db
+from exports import EXPORT_FORMATS, export_chunks, parse_since
+from log import queue_stats
+from mailer import mail_sender
+from order_events import order_events
+from render_cache import render_cache
+from reviews import moderate_review, pending_reviews, rating_summary, reviews_version
+from views import admin_required
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/debug/stripe')
+def debug_stripe():
+    """Debug endpoint to check Stripe configuration"""
+    secret_key = settings.STRIPE_SECRET_KEY
+    publishable_key = settings.STRIPE_PUBLISHABLE_KEY
+    return jsonify({
+        'stripe_api_key_set': secret_key is not None and secret_key != '',
+        'stripe_api_key_length': len(secret_key) if secret_key else 0,
+        'stripe_api_key_prefix': secret_key[:7] if secret_key else 'None',
+        'stripe_publishable_key_set': publishable_key != 'pk_test_default',
+        'stripe_publishable_key_prefix': publishable_key[:7] if publishable_key else 'None',
+        'env_vars_raw': {
+            'STRIPE_SECRET_KEY_exists': os.getenv('STRIPE_SECRET_KEY') is not None,
+            'STRIPE_PUBLISHABLE_KEY_exists': os.getenv('STRIPE_PUBLISHABLE_KEY') is not None
+        }
+    })
+
+
+@bp.route('/debug/catalog')
+@admin_required
+def debug_catalog():
+    """Debug endpoint to check product catalog cache statistics"""
+    return jsonify(catalog.stats())
+
+
+@bp.route('/debug/db')
+@admin_required
+def debug_db():
+    """Debug endpoint to check database connection pool statistics"""
+    return jsonify(db_pool.pool.stats())
+
+
+@bp.route('/debug/mail')
+@admin_required
+def debug_mail():
+    """Debug endpoint to check background mail sender statistics"""
+    return jsonify(mail_sender.stats())
+
+
+@bp.route('/debug/logging')
+@admin_required
+def debug_logging():
+    """Debug endpoint to check the log queue (records dropped when it is full)"""
+    return jsonify(queue_stats())
+
+
+@bp.route('/debug/carts')
+@admin_required
+def debug_carts():
+    """Debug endpoint to check server-side cart cache statistics"""
+    return jsonify(cart_store.stats())
+
+
+@bp.route('/debug/order-streams')
+@admin_required
+def debug_order_streams():
+    """Debug endpoint to check open order status streams"""
+    return jsonify(order_events.stats())
+
+
+@bp.route('/debug/render-cache')
+@admin_required
+def debug_render_cache():
+    """Debug endpoint to check rendered page cache statistics"""
+    return jsonify(render_cache.stats())
+
+
+@bp.route('/admin/export/<kind>')
+@admin_required
+def admin_export(kind):
+    """Stream orders or reviews as CSV (default) or NDJSON, optionally since= a date"""
+    fmt = request.args.get('format', 'csv')
+    if kind not in ('orders', 'reviews') or fmt not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unknown export'}), 404
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError:
+        return jsonify({'error': 'since must be an ISO date or datetime'}), 400
+
+    def generate():
+        # A dedicated pooled connection for the whole stream, not the request's
+        db = db_pool.pool.acquire()
+        try:
+            for chunk in export_chunks(db, kind, fmt, since):
+                yield chunk
+        finally:
+            db_pool.pool.release(db)
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    filename = f"{kind}-{since[:10] if since else 'all'}.{fmt}"
+    return Response(generate(), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@bp.route('/admin/reviews')
+@admin_required
+def admin_pending_reviews():
+    """Moderation queue: pending reviews, oldest first, in keyset pages (?after=<review id>)"""
+    rows = pending_reviews(get_db(), after=request.args.get('after', type=int))
+    return jsonify({
+        'reviews': [dict(row) for row in rows],
+        'next_after': rows[-1]['id'] if rows else None,
+    })
+
+
+@bp.route('/admin/reviews/<int:review_id>/moderate', methods=['POST'])
+@admin_required
+def admin_moderate_review(review_id):
+    """Approve or reject a review: {"action": "approve" | "reject"}"""
+    action = (request.get_json(silent=True) or {}).get('action')
+    if action not in ('approve', 'reject'):
+        return jsonify({'error': 'action must be approve or reject'}), 400
+
+    db = get_db()
+    state = moderate_review(db, review_id, approve=action == 'approve')
+    if state is None:
+        return jsonify({'error': 'Review not found'}), 404
+
+    # Pages in this process see the change now; others within REVIEWS_VERSION_TTL
+    reviews_version.refresh()
+    render_cache.clear()
+
+    return jsonify({'success': True, 'approved': state, 'summary': rating_summary(db)})
+
+
+@bp.route('/metrics')
+@admin_required
+def prometheus_metrics():
+    """Request latency and component timings in Prometheus text format"""
+    return Response(metrics.request_metrics.render(), mimetype=metrics.CONTENT_TYPE)
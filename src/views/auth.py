@@ -0,0 +1,114 @@
+"""Account pages: registration, login and logout"""
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from db import get_db
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    """User registration"""
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+        confirm_password = request.form.get('confirm_password')
+        first_name = request.form.get('first_name')
+        last_name = request.form.get('last_name')
+
+        # Validation
+        if not all([email, password, first_name, last_name]):
+            flash('All fields are required.', 'error')
+            return redirect(url_for('auth.register'))
+
+        if password != confirm_password:
+            flash('Passwords do not match.', 'error')
+            return redirect(url_for('auth.register'))
+
+        if len(password) < 6:
+            flash('Password must be at least 6 characters long.', 'error')
+            return redirect(url_for('auth.register'))
+
+        # Check if user exists
+        db = get_db()
+        existing_user = db.execute('SELECT id FROM users WHERE email = ?', (email,)).fetchone()
+
+        if existing_user:
+            flash('Email already registered. Please log in.', 'error')
+            # Preserve redirect parameter if it exists
+            redirect_path = request.args.get('redirect')
+            if redirect_path:
+                return redirect(url_for('auth.login', redirect=redirect_path))
+            return redirect(url_for('auth.login'))
+
+        # Create user
+        password_hash = generate_password_hash(password, method='pbkdf2:sha256')
+        try:
+            db.execute(
+                'INSERT INTO users (email, password_hash, first_name, last_name) VALUES (?, ?, ?, ?)',
+                (email, password_hash, first_name, last_name)
+            )
+            db.commit()
+            flash('Account created successfully! Please log in.', 'success')
+            # Preserve redirect parameter if it exists
+            redirect_path = request.args.get('redirect')
+            if redirect_path:
+                return redirect(url_for('auth.login', redirect=redirect_path))
+            return redirect(url_for('auth.login'))
+        except Exception as e:
+            flash('An error occurred. Please try again.', 'error')
+            return redirect(url_for('auth.register'))
+
+    return render_template('register.html')
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    """User login"""
+    if request.method == 'POST':
+        email = request.form.get('email')
+        password = request.form.get('password')
+
+        if not email or not password:
+            flash('Email and password are required.', 'error')
+            return redirect(url_for('auth.login'))
+
+        db = get_db()
+        user = db.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+
+        if user and check_password_hash(user['password_hash'], password):
+            session.permanent = True  # Make session persistent
+            session['user_id'] = user['id']
+            session['user_email'] = user['email']
+            session['user_name'] = f"{user['first_name']} {user['last_name']}"
+            flash(f'Welcome back, {user["first_name"]}!', 'success')
+
+            # Check if there's a redirect parameter (URL path)
+            redirect_path = request.args.get('redirect')
+            if redirect_path:
+                # Redirect to the stored path
+                return redirect(redirect_path)
+
+            return redirect(url_for('catalog.home'))
+        else:
+            flash('Invalid email or password.', 'error')
+            return redirect(url_for('auth.login'))
+
+    return render_template('login.html')
+
+
+@bp.route('/logout')
+def logout():
+    """User logout"""
+    session.clear()
+    flash('You have been logged out successfully.', 'success')
+    return redirect(url_for('catalog.home'))
+
+
+@bp.route('/account')
+def account():
+    """User account dashboard - authentication handled by Firebase on client side"""
+    # No server-side authentication needed - Firebase handles it in the browser
+    return render_template('account.html')
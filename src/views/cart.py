@@ -0,0 +1,161 @@
+"""Shopping cart page and cart APIs"""
+
+import sqlite3
+
+from flask import Blueprint, jsonify, render_template, request, session
+
+import settings
+from cart_store import Cart, cart_lines, cart_store, session_items, unit_price_cents
+from catalog import catalog
+from log import get_logger
+from views import setup_storefront
+
+log = get_logger(__name__)
+
+bp = Blueprint('cart', __name__)
+bp.record_once(setup_storefront)
+
+
+def cookie_cart():
+    """Cart from items kept in the session cookie (no cart store, or an older version)"""
+    return Cart.from_items(session_items(session.get('cart')), catalog)
+
+
+def load_cart():
+    """The session's Cart (shared with the cart cache; copy() before changing it)"""
+    cart_id = session.get('cart_id')
+    if not cart_id and session.get('cart'):
+        return cookie_cart()
+    try:
+        return cart_store.load(cart_id, session.get('cart_rev'))
+    except sqlite3.Error as e:
+        log.warning('Cart store unavailable, using the cookie cart: %s', e)
+        return cookie_cart()
+
+
+def save_cart(cart):
+    """Persist the cart server-side; the cookie only keeps its id and revision
+
+    If the cart store cannot be written, the compact items go into the
+    cookie instead and are moved to the store by a later save.
+    """
+    cart_id = session.get('cart_id') or cart_store.new_id()
+    try:
+        revision = cart_store.save(cart_id, cart)
+    except sqlite3.Error as e:
+        log.warning('Cart store unavailable, keeping the cart in the cookie: %s', e)
+        session.pop('cart_id', None)
+        session.pop('cart_rev', None)
+        session['cart'] = cart.items()
+        return
+    session.pop('cart', None)
+    session['cart_id'] = cart_id
+    session['cart_rev'] = revision
+
+
+def cart_key(data):
+    """(product_id, variant, color) key of the cart line a request refers to"""
+    return (int(data['product_id']), data.get('variant', ''), data.get('color', ''))
+
+
+def cart_totals(cart):
+    return {'cart_count': cart.count, 'subtotal': cart.subtotal_cents / 100}
+
+
+def apply_cart_operation(cart, op):
+    """Apply one add/update/remove operation to a Cart; raises ValueError if it is invalid"""
+    try:
+        key = cart_key(op)
+        kind = op.get('op', 'add')
+        if kind == 'add':
+            product = catalog.get(key[0])
+            if product is None:
+                raise ValueError('Product not found')
+            cart.add(key, max(1, int(op.get('quantity', 1))), unit_price_cents(product, key[1]))
+        elif kind == 'update':
+            if not cart.set_quantity(key, max(1, int(op['quantity']))):
+                raise ValueError('Item not in cart')
+        elif kind == 'remove':
+            cart.remove(key)
+        else:
+            raise ValueError(f'Unknown cart operation: {kind}')
+    except (KeyError, TypeError) as e:
+        raise ValueError(f'Invalid cart operation: {e}')
+
+
+def cart_change(op, **extra):
+    """Apply a single operation for the /cart/add, /cart/update and /cart/remove routes"""
+    cart = load_cart().copy()
+    try:
+        apply_cart_operation(cart, op)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+    save_cart(cart)
+    return jsonify({'success': True, **extra, **cart_totals(cart)})
+
+
+@bp.route('/cart')
+def view_cart():
+    """Display shopping cart"""
+    cart = load_cart()
+    return render_template('cart.html', cart=cart_lines(cart, catalog), cart_count=cart.count,
+                           subtotal=cart.subtotal_cents / 100,
+                           stripe_publishable_key=settings.STRIPE_PUBLISHABLE_KEY)
+
+
+@bp.route('/cart/add', methods=['POST'])
+def add_to_cart():
+    """Add item to shopping cart"""
+    return cart_change({**request.get_json(), 'op': 'add'}, message='Item added to cart!')
+
+
+@bp.route('/cart/update', methods=['POST'])
+def update_cart():
+    """Update cart item quantity"""
+    return cart_change({**request.get_json(), 'op': 'update'})
+
+
+@bp.route('/cart/remove', methods=['POST'])
+def remove_from_cart():
+    """Remove item from cart"""
+    return cart_change({**request.get_json(), 'op': 'remove'})
+
+
+@bp.route('/cart/count')
+def cart_count():
+    """Get current cart item count"""
+    return jsonify({'count': load_cart().count})
+
+
+@bp.route('/api/cart/batch', methods=['POST'])
+def api_cart_batch():
+    """Apply an ordered list of cart operations atomically and return the new cart
+
+    Body: {"operations": [{"op": "add"|"update"|"remove", "product_id": ...,
+    "variant": ..., "color": ..., "quantity": ...}, ...]}. Either every
+    operation is applied (one cart write, one session update) or, if any
+    is invalid, none are.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list):
+        return jsonify({'success': False, 'message': 'operations must be a list'}), 400
+
+    cart = load_cart().copy()
+    for index, op in enumerate(operations):
+        try:
+            if not isinstance(op, dict):
+                raise ValueError('Invalid cart operation')
+            apply_cart_operation(cart, op)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e), 'index': index}), 400
+
+    if operations:
+        save_cart(cart)
+
+    return jsonify({
+        'success': True,
+        'items': cart_lines(cart, catalog),
+        'subtotal_cents': cart.subtotal_cents,
+        **cart_totals(cart)
+    })
@@ -0,0 +1,164 @@
+"""Catalog pages and product APIs: home, product listing, search and product detail"""
+
+import os
+import sqlite3
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for
+
+import settings
+from catalog import catalog, price_to_cents, product_summary
+from db import get_db
+from http_cache import conditional
+from log import get_logger
+from render_cache import cached_fragment, cached_page
+from reviews import approved_reviews, empty_summary, rating_summary, reviews_version
+from search import SORT_OPTIONS, product_search
+from views import setup_storefront
+
+log = get_logger(__name__)
+
+bp = Blueprint('catalog', __name__)
+bp.record_once(setup_storefront)
+
+PRODUCTS_PAGE_SIZE = int(os.getenv('PRODUCTS_PAGE_SIZE', 24))
+PRODUCTS_PAGE_MAX = 100
+
+
+def load_products():
+    """Return the cached, read-only product list (reloaded when the JSON file changes)."""
+    return catalog.products()
+
+
+def page_args():
+    """Parse keyset pagination arguments (?after=<id>&limit=n); raises ValueError"""
+    after = request.args.get('after')
+    after = int(after) if after not in (None, '') else None
+    limit = int(request.args.get('limit', PRODUCTS_PAGE_SIZE))
+    return after, min(max(limit, 1), PRODUCTS_PAGE_MAX)
+
+
+@bp.route('/')
+@conditional('index.html')
+@cached_page
+def home():
+    product_list = load_products()
+    return render_template('index.html', products=product_list)
+
+
+@bp.route('/products')
+@conditional('products.html', '_product_cards.html')
+@cached_page
+def products():
+    try:
+        after, limit = page_args()
+    except ValueError:
+        after, limit = None, PRODUCTS_PAGE_SIZE
+    product_list, next_cursor = catalog.snapshot().page(after, limit)
+    cards = render_product_cards(product_list, after, limit)
+    return render_template('products.html', products=product_list, product_cards=cards,
+                           next_cursor=next_cursor, limit=limit,
+                           stripe_publishable_key=settings.STRIPE_PUBLISHABLE_KEY)
+
+
+def render_product_cards(product_list, after, limit):
+    """Product card markup for one page, shared by /products and /products/cards"""
+    return cached_fragment('product_cards', (after, limit),
+                           lambda: render_template('_product_cards.html', products=product_list))
+
+
+@bp.route('/products/cards')
+@conditional('_product_cards.html')
+def product_cards():
+    """HTML fragment with the next page of product cards for infinite scroll"""
+    try:
+        after, limit = page_args()
+    except ValueError:
+        return 'Invalid paging parameter', 400
+    product_list, next_cursor = catalog.snapshot().page(after, limit)
+    response = current_app.make_response(str(render_product_cards(product_list, after, limit)))
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+
+@bp.route('/api/products')
+@conditional()
+def api_products():
+    """Keyset-paginated product listing"""
+    try:
+        after, limit = page_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid paging parameter'}), 400
+    product_list, next_cursor = catalog.snapshot().page(after, limit)
+    return jsonify({
+        'products': [product_summary(p) for p in product_list],
+        'next_cursor': next_cursor,
+        'limit': limit
+    })
+
+
+@bp.route('/api/products/search')
+@conditional()
+def api_products_search():
+    """Search products by title with optional price range, sorting and paging"""
+    query = request.args.get('q', '').strip()
+    sort = request.args.get('sort', 'relevance')
+    if sort not in SORT_OPTIONS:
+        return jsonify({'error': f"sort must be one of: {', '.join(SORT_OPTIONS)}"}), 400
+
+    try:
+        min_price = request.args.get('min_price')
+        max_price = request.args.get('max_price')
+        min_cents = price_to_cents(min_price) if min_price else None
+        max_cents = price_to_cents(max_price) if max_price else None
+        limit = min(max(int(request.args.get('limit', 24)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except (ValueError, ArithmeticError):
+        return jsonify({'error': 'Invalid price or paging parameter'}), 400
+
+    snapshot = catalog.snapshot()
+    matches = product_search.search(query, min_cents, max_cents, sort)
+    page = (snapshot.get(pid) for pid in matches[offset:offset + limit])
+
+    return jsonify({
+        'query': query,
+        'sort': sort,
+        'total': len(matches),
+        'offset': offset,
+        'limit': limit,
+        'products': [product_summary(p) for p in page if p is not None]
+    })
+
+
+@bp.route('/product/<int:product_id>')
+@conditional('product_detail.html', versions=[reviews_version])
+@cached_page(versions=[reviews_version])
+def product_detail(product_id):
+    """Display individual product detail page"""
+    cached = catalog.get(product_id)
+
+    if cached is not None:
+        product = dict(cached)
+
+        # Variants, colors, description and details are filled in when the
+        # catalog loads; the rating comes from the precomputed summary row
+        try:
+            db = get_db()
+            summary = rating_summary(db, product_id)
+            rows, _ = approved_reviews(db, product_id=product_id, limit=3)
+        except sqlite3.Error as e:
+            # No reviews tables (read-only deploy where migrations could not run)
+            log.warning('Reviews unavailable for product %s: %s', product_id, e)
+            summary, rows = empty_summary(), []
+        product['rating'] = summary['average'] or 0
+        product['review_count'] = summary['count']
+        product['reviews'] = [
+            {'name': row['user_name'], 'rating': row['rating'], 'date': row['created_at'][:10], 'comment': row['review_text']}
+            for row in rows
+        ]
+
+        return render_template('product_detail.html', product=product,
+                               stripe_publishable_key=settings.STRIPE_PUBLISHABLE_KEY)
+
+    flash('Product not found', 'error')
+    return redirect(url_for('catalog.products'))
@@ -0,0 +1,335 @@
+"""Checkout and payments: Stripe Checkout sessions, order status and order pages"""
+
+import hashlib
+import hmac
+import json
+import queue
+import sqlite3
+import time
+
+from flask import (Blueprint, Response, current_app, flash, jsonify, redirect, render_template, request,
+                   session, stream_with_context, url_for)
+
+import db as db_pool
+import settings
+from cart_store import cart_lines, catalog_variant, unit_price_cents
+from catalog import catalog, price_to_cents
+from db import get_db
+from log import get_logger
+from order_events import (FINAL_STATUSES, ORDER_STREAM_HEARTBEAT_SECONDS, ORDER_STREAM_IDLE_SECONDS,
+                          TooManySubscribers, order_events)
+from orders import create_order, order_items
+from stripe_prices import product_key, stripe_api, stripe_prices
+from views import setup_storefront
+from views.cart import load_cart
+
+log = get_logger(__name__)
+
+bp = Blueprint('checkout', __name__)
+bp.record_once(setup_storefront)
+
+
+def checkout_line_item(item):
+    """Stripe line item for an order item, referencing a cached Stripe price for catalog products
+
+    Only catalog products and variants, at catalog prices, go through the
+    price cache (which creates Stripe Products and Prices on a miss).
+    Anything else is sent as inline price_data.
+    """
+    product = catalog.get(item['product_id']) if item['product_id'] is not None else None
+    if product is None:
+        return {
+            'price_data': {
+                'currency': 'usd',
+                'product_data': {'name': item['product_name']},
+                'unit_amount': item['unit_cents'],
+            },
+            'quantity': item['quantity'],
+        }
+    variant = catalog_variant(product, item['variant'])
+    name = f"{product['title']} - {variant}" if variant else product['title']
+    return stripe_prices.line_item(product_key(product), variant, unit_price_cents(product, variant),
+                                   item['quantity'], name)
+
+
+@bp.route('/create-checkout-session', methods=['POST'])
+def create_checkout_session():
+    data = request.get_json()
+
+    # Check if Firebase user data is provided
+    firebase_user = data.get('firebase_user')
+    if not firebase_user or not firebase_user.get('uid'):
+        return jsonify({'error': 'login_required', 'message': 'Please login or create an account to complete your purchase'}), 401
+
+    # Use Firebase UID as user identifier
+    user_id = firebase_user['uid']
+    user_email = firebase_user.get('email', 'unknown@email.com')
+    user_name = firebase_user.get('displayName', 'Customer')
+    try:
+        # Check if Stripe is configured (line items may need Stripe price ids)
+        if not settings.STRIPE_SECRET_KEY or settings.STRIPE_SECRET_KEY == 'None':
+            log.error('Stripe API key is not configured')
+            return jsonify({
+                'error': 'Stripe not configured',
+                'message': 'Payment processing is not available. Please contact support.'
+            }), 500
+
+        # Check if this is a cart checkout or single product
+        if data.get('checkout_type') == 'cart':
+            cart = load_cart()
+            if not cart:
+                return jsonify({'error': 'Cart is empty'}), 400
+
+            # Order items from the cart (prices already come from the catalog)
+            items = [{
+                'product_id': line['product_id'],
+                'product_name': line['name'],
+                'variant': line['variant'],
+                'color': line['color'],
+                'unit_cents': line['unit_cents'],
+                'quantity': line['quantity'],
+            } for line in cart_lines(cart, catalog)]
+
+            product_names = [f"{item['product_name']} (x{item['quantity']})" for item in items]
+            order_name = ', '.join(product_names[:3])  # First 3 items
+            if len(product_names) > 3:
+                order_name += f" and {len(product_names) - 3} more"
+
+        elif data.get('product_id') is not None:
+            # Single catalog product checkout (unit price x quantity)
+            product_id = int(data['product_id'])
+            product = catalog.get(product_id)
+            if product is None:
+                # Never price a product id from the client's name and price
+                return jsonify({'error': 'Product not found'}), 404
+            variant = catalog_variant(product, data.get('variant', ''))
+            items = [{
+                'product_id': product_id,
+                'product_name': product['title'],
+                'variant': variant,
+                'color': data.get('color', ''),
+                'unit_cents': unit_price_cents(product, variant),
+                'quantity': max(1, int(data.get('quantity', 1))),
+            }]
+            order_name = product['title']
+
+        else:
+            # Single product checkout
+            items = [{
+                'product_id': None,
+                'product_name': data['name'],
+                'variant': '',
+                'color': '',
+                'unit_cents': price_to_cents(data['price']),
+                'quantity': 1,
+            }]
+            order_name = data['name']
+
+        line_items = [checkout_line_item(item) for item in items]
+
+        # Direct redirect to success page (no database needed)
+        success_url = f'{settings.BASE_URL}/order-success'
+        log.debug('Creating Stripe session', extra={'success_url': success_url, 'line_items': len(line_items)})
+
+        checkout_session = stripe_api().checkout.Session.create(
+            payment_method_types=['card'],
+            line_items=line_items,
+            mode='payment',
+            success_url=success_url,
+            cancel_url=f'{settings.BASE_URL}/products',
+            metadata={
+                'user_id': user_id,
+                'user_email': user_email,
+                'user_name': user_name,
+                'order_name': order_name
+            }
+        )
+
+        # Record the order and its items locally; the webhook inbox updates
+        # its status. A read-only filesystem (Vercel) must not block payment.
+        order_id = None
+        try:
+            order_id = create_order(
+                get_db(), checkout_session.id,
+                {'uid': user_id, 'email': user_email, 'name': user_name},
+                order_name, items, user_id=session.get('user_id')
+            )
+        except sqlite3.Error as e:
+            log.warning('Could not record order for session %s: %s', checkout_session.id, e)
+
+        log.info('Checkout session created', extra={'session_id': checkout_session.id, 'order_id': order_id})
+        return jsonify({
+            'id': checkout_session.id,
+            'url': checkout_session.url,
+            'order_id': order_id
+        })
+    except Exception as e:
+        log.warning('Error creating checkout session: %s', e)
+        return jsonify({'error': str(e)}), 400
+
+
+@bp.route('/order-success')
+def order_success():
+    """Handle successful payment - simplified for serverless"""
+    return render_template('order_success.html')
+
+
+@bp.route('/payment-processing/<int:order_id>')
+def payment_processing(order_id):
+    """Show payment processing page with auto-redirect"""
+    token = request.args.get('token')
+    if not token:
+        flash('Invalid payment link', 'error')
+        return redirect(url_for('catalog.products'))
+
+    return render_template('payment_processing.html', order_id=order_id, token=token)
+
+
+def order_token(order_id, user_id):
+    """Access token for an order's status and detail pages"""
+    return hashlib.sha256(f"{order_id}-{user_id}-{current_app.secret_key}".encode()).hexdigest()[:16]
+
+
+def valid_order_token(order_id, user_id, token):
+    return bool(token) and hmac.compare_digest(token, order_token(order_id, user_id))
+
+
+def read_order_status(order_id):
+    """(user_id, status) of an order without holding a connection for the request"""
+    db = db_pool.pool.acquire()
+    try:
+        return db.execute('SELECT user_id, status FROM orders WHERE id = ?', (order_id,)).fetchone()
+    finally:
+        db_pool.pool.release(db)
+
+
+@bp.route('/api/order-status/<int:order_id>')
+def api_order_status(order_id):
+    """API endpoint to check order status"""
+    token = request.args.get('token')
+
+    # Verify token
+    db = get_db()
+    order = db.execute('SELECT user_id, status FROM orders WHERE id = ?', (order_id,)).fetchone()
+
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
+
+    if not valid_order_token(order_id, order['user_id'], token):
+        return jsonify({'error': 'Invalid token'}), 403
+
+    return jsonify({'status': order['status']})
+
+
+@bp.route('/api/order-status/<int:order_id>/stream')
+def api_order_status_stream(order_id):
+    """Server-Sent Events stream of an order's status until it is final
+
+    Sends the current status right away, then each change pushed by the
+    webhook inbox. Heartbeat comments keep proxies from closing the
+    connection, and the stream ends with a `timeout` event after
+    ORDER_STREAM_IDLE_SECONDS without a change.
+    """
+    order = read_order_status(order_id)
+    if not order:
+        return jsonify({'error': 'Order not found'}), 404
+    if not valid_order_token(order_id, order['user_id'], request.args.get('token')):
+        return jsonify({'error': 'Invalid token'}), 403
+
+    def event(name, status):
+        return f"event: {name}\ndata: {json.dumps({'status': status})}\n\n"
+
+    status = order['status']
+    if status in FINAL_STATUSES:
+        return Response(event('status', status), mimetype='text/event-stream')
+
+    try:
+        subscriber = order_events.subscribe(order_id)
+    except TooManySubscribers:
+        # EventSource treats a non-200 response as fatal and fires onerror;
+        # the payment page then falls back to polling /api/order-status
+        return jsonify({'error': 'Too many status streams'}), 503
+
+    def stream():
+        current = status
+        idle_until = time.monotonic() + ORDER_STREAM_IDLE_SECONDS
+        try:
+            yield event('status', current)
+            while time.monotonic() < idle_until:
+                try:
+                    new_status = subscriber.get(timeout=ORDER_STREAM_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    # The change may have been applied by another worker process
+                    row = read_order_status(order_id)
+                    new_status = row['status'] if row else current
+                if new_status == current:
+                    yield ': heartbeat\n\n'
+                    continue
+                current = new_status
+                idle_until = time.monotonic() + ORDER_STREAM_IDLE_SECONDS
+                yield event('status', current)
+                if current in FINAL_STATUSES:
+                    return
+            yield event('timeout', current)
+        finally:
+            order_events.unsubscribe(order_id, subscriber)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # don't let nginx buffer the stream
+    })
+
+
+@bp.route('/order/<int:order_id>')
+def order_detail(order_id):
+    """Display order details"""
+    # Check for payment success parameter and token
+    payment_success = request.args.get('payment') == 'success'
+    token = request.args.get('token')
+
+    db = get_db()
+    order = db.execute('''
+        SELECT o.*,
+               COALESCE(u.email, o.customer_email) AS email,
+               COALESCE(u.first_name, o.customer_name) AS first_name,
+               u.last_name
+        FROM orders o
+        LEFT JOIN users u ON o.user_id = u.id
+        WHERE o.id = ?
+    ''', (order_id,)).fetchone()
+
+    if not order:
+        log.info('Order %s not found', order_id)
+        flash('Order not found', 'error')
+        return redirect(url_for('catalog.products'))
+
+    # Verify token if provided (allows access without session)
+    has_token_access = valid_order_token(order_id, order['user_id'], token)
+    has_session_access = 'user_id' in session and session['user_id'] == order['user_id']
+
+    log.debug('Order detail access', extra={'order_id': order_id, 'payment_success': payment_success,
+                                            'link_access': has_token_access, 'session_access': has_session_access})
+
+    if not has_token_access and not has_session_access:
+        log.info('Order %s access denied', order_id)
+        flash('Access denied. Please log in to view this order.', 'error')
+        return redirect(url_for('auth.login'))
+
+    # Show success message if coming from payment
+    if payment_success and order['status'] == 'completed':
+        flash('Payment successful! Your order has been confirmed.', 'success')
+    elif payment_success and order['status'] == 'pending':
+        flash('Payment is being processed. Your order will be confirmed shortly.', 'info')
+
+    return render_template('order_detail.html', order=order, items=order_items(db, order_id))
+
+
+@bp.route('/success')
+def success():
+    return "Payment successful! Thank you for your purchase."
+
+
+@bp.route('/cancel')
+def cancel():
+    flash('Payment cancelled. Please try again when ready.', 'info')
+    return redirect(url_for('catalog.products'))
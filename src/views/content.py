@@ -0,0 +1,189 @@
+"""Content pages: contact form, reviews, FAQ and review submission"""
+
+import os
+import sqlite3
+from datetime import datetime
+
+from flask import Blueprint, flash, jsonify, redirect, render_template, request, url_for
+
+from catalog import catalog
+from db import get_db
+from http_cache import conditional
+from log import get_logger
+from mailer import EMAIL_AUTOSTART, enqueue_email, mail_sender, send_email
+from render_cache import cached_page
+from reviews import approved_reviews, empty_summary, rating_summary, reviews_version, submit_review
+from views import setup_storefront
+
+log = get_logger(__name__)
+
+bp = Blueprint('content', __name__)
+bp.record_once(setup_storefront)
+
+if EMAIL_AUTOSTART:
+    # Send messages still pending (or waiting out a retry) from an earlier
+    # process. start() is once per process, so the request hook also covers
+    # workers forked after start-up (--preload).
+    bp.record_once(lambda state: mail_sender.start())
+    bp.before_app_request(mail_sender.start)
+
+
+@bp.route('/contact')
+def contact():
+    return render_template('contact.html')
+
+
+@bp.route('/contact', methods=['POST'])
+def contact_submit():
+    """Handle contact form submission"""
+    try:
+        name = request.form.get('name')
+        email = request.form.get('email')
+        subject = request.form.get('subject')
+        message = request.form.get('message')
+
+        email_user = os.getenv('EMAIL_USER')
+        if not email_user:
+            flash('Email configuration error. Please try again later.', 'error')
+            return redirect(url_for('content.contact'))
+
+        body = f"""
+        New contact form submission:
+
+        Name: {name}
+        Email: {email}
+        Subject: {subject}
+
+        Message:
+        {message}
+        """
+
+        # Queue the email; the background sender delivers it over a pooled SMTP connection.
+        # Without a writable outbox (read-only deploy) send it right away instead.
+        try:
+            enqueue_email(get_db(), email_user, email_user, f"Contact Form: {subject}", body)
+        except sqlite3.Error as e:
+            log.warning('Email outbox unavailable, sending synchronously: %s', e)
+            send_email(email_user, email_user, f"Contact Form: {subject}", body)
+        else:
+            mail_sender.notify()
+
+        flash('Thank you! Your message has been sent successfully.', 'success')
+        return redirect(url_for('content.contact'))
+
+    except Exception:
+        log.exception('Error sending contact form email')
+        flash('Sorry, there was an error sending your message. Please try again.', 'error')
+        return redirect(url_for('content.contact'))
+
+
+@bp.route('/reviews')
+@conditional('reviews.html', versions=[reviews_version])
+@cached_page(versions=[reviews_version])
+def reviews():
+    """Approved reviews, newest first, in keyset pages (?before=<review id>)"""
+    try:
+        db = get_db()
+        rows, next_cursor = approved_reviews(db, before=request.args.get('before', type=int))
+        summary = rating_summary(db)
+    except sqlite3.Error as e:
+        # No reviews tables (read-only deploy where migrations could not run)
+        log.warning('Reviews unavailable: %s', e)
+        rows, next_cursor, summary = [], None, empty_summary()
+    reviews_data = [
+        {
+            'name': row['user_name'],
+            'rating': row['rating'],
+            'date': datetime.strptime(row['created_at'], '%Y-%m-%d %H:%M:%S').strftime('%B %Y'),
+            'text': row['review_text'],
+            'image': None
+        }
+        for row in rows
+    ]
+    return render_template('reviews.html', reviews=reviews_data, summary=summary, next_cursor=next_cursor)
+
+
+@bp.route('/qa')
+@conditional('qa.html')
+@cached_page
+def qa():
+    # FAQ data
+    faq_data = [
+        {
+            'question': 'How far in advance should I order?',
+            'answer': 'We recommend ordering at least 2-3 weeks in advance for custom orders. Standard toppers can usually be prepared within 1 week. For rush orders, please contact us directly.'
+        },
+        {
+            'question': 'Are your fondant decorations edible?',
+            'answer': 'Yes! All our fondant toppers are made from 100% edible, food-safe ingredients. However, many customers choose to keep them as keepsakes due to their detailed craftsmanship.'
+        },
+        {
+            'question': 'How should I store the toppers before use?',
+            'answer': 'Store in a cool, dry place away from direct sunlight. Keep them in an airtight container to prevent humidity damage. Avoid refrigeration as moisture can affect the fondant.'
+        },
+        {
+            'question': 'Can you create custom designs?',
+            'answer': 'Absolutely! We love creating custom pieces. Contact us with your ideas, theme, or color preferences, and we\'ll work with you to create the perfect topper for your celebration.'
+        },
+        {
+            'question': 'What is your cancellation policy?',
+            'answer': 'Orders can be cancelled within 24 hours of purchase for a full refund. After work has begun on custom orders, cancellations may be subject to a fee depending on the progress.'
+        },
+        {
+            'question': 'Do you ship internationally?',
+            'answer': 'Currently, we ship within the United States. International shipping can be arranged for certain items - please contact us for details and shipping costs.'
+        },
+        {
+            'question': 'How are the toppers packaged for shipping?',
+            'answer': 'Each topper is carefully packaged in protective materials and shipped in sturdy boxes to ensure they arrive in perfect condition. We take extra care with delicate pieces.'
+        },
+        {
+            'question': 'What if my topper arrives damaged?',
+            'answer': 'While rare, if your topper arrives damaged, please contact us immediately with photos. We will work with you to either provide a replacement or issue a refund.'
+        }
+    ]
+    return render_template('qa.html', faqs=faq_data)
+
+
+@bp.route('/api/submit-review', methods=['POST'])
+def api_submit_review():
+    """API endpoint to submit a review from logged-in users"""
+    try:
+        data = request.get_json()
+
+        # Validate required fields
+        user_name = data.get('user_name', '').strip()
+        user_email = data.get('user_email', '').strip()
+        rating = data.get('rating')
+        review_text = data.get('review_text', '').strip()
+
+        if not user_name:
+            return jsonify({'success': False, 'message': 'Name is required'}), 400
+
+        if not user_email:
+            return jsonify({'success': False, 'message': 'Email is required'}), 400
+
+        if not rating or not isinstance(rating, int) or rating < 1 or rating > 5:
+            return jsonify({'success': False, 'message': 'Rating must be between 1 and 5'}), 400
+
+        if not review_text or len(review_text) < 10:
+            return jsonify({'success': False, 'message': 'Review must be at least 10 characters'}), 400
+
+        product_id = data.get('product_id')
+        if product_id is not None and (not isinstance(product_id, int) or catalog.get(product_id) is None):
+            return jsonify({'success': False, 'message': 'Unknown product'}), 400
+
+        # Insert the review (pending approval)
+        submit_review(get_db(), user_name, user_email, rating, review_text, product_id)
+
+        return jsonify({
+            'success': True,
+            'message': 'Thank you for your review! It will be published after approval.'
+        }), 200
+
+    except Exception:
+        log.exception('Error submitting review')
+        return jsonify({
+            'success': False,
+            'message': 'An error occurred while submitting your review. Please try again.'
+        }), 500
@@ -0,0 +1,11 @@
+"""
+Webhook-only entry point for a separate serverless function.
+
+Registers just the Stripe webhook blueprint, so its cold start never loads
+the catalog, search index, page caches or templates. Routed to /webhook in
+vercel.json.
+"""
+
+from factory import create_app
+
+app = create_app(['webhooks'])
@@ -0,0 +1,210 @@
+"""
+Durable, idempotent inbox for Stripe webhook events.
+
+The webhook route only verifies the signature, stores the raw event in the
+`stripe_events` table keyed by Stripe's event id (INSERT OR IGNORE, so a
+redelivered event is dropped) and acknowledges. A small pool of background
+workers drains the inbox in batches and applies order status transitions,
+one BEGIN IMMEDIATE transaction per batch.
+
+Because the inbox is in SQLite, events received just before a process is
+frozen or recycled (e.g. on serverless) are picked up by the next worker
+that starts. An event that fails is retried with exponential backoff up to
+WEBHOOK_MAX_ATTEMPTS times and then parked with its last error.
+
+Where the inbox cannot be written (e.g. a read-only deploy), the route
+applies the event inline with apply_now() and still acknowledges it, as it
+did before the inbox existed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+from db import pool
+from log import get_logger
+from order_events import order_events
+
+log = get_logger(__name__)
+
+WEBHOOK_WORKERS = int(os.getenv('WEBHOOK_WORKERS', 2))
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', 50))
+WEBHOOK_POLL_SECONDS = float(os.getenv('WEBHOOK_POLL_SECONDS', 5))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', 5))
+# Start the workers with the app (long-running servers) rather than on the
+# first delivery; off on serverless, where cold starts should not open the database
+WEBHOOK_AUTOSTART = os.getenv('WEBHOOK_AUTOSTART', 'True') == 'True'
+
+# event type -> (new status, statuses it may replace)
+TRANSITIONS = {
+    'checkout.session.completed': ('completed', ('pending',)),
+    'checkout.session.async_payment_succeeded': ('completed', ('pending',)),
+    'checkout.session.async_payment_failed': ('failed', ('pending',)),
+    'checkout.session.expired': ('expired', ('pending',)),
+}
+
+
+def store_event(db, event_id, event_type, payload):
+    """Persist a verified event; returns False if the id was already stored"""
+    cursor = db.execute(
+        'INSERT OR IGNORE INTO stripe_events (id, type, payload) VALUES (?, ?, ?)',
+        (event_id, event_type, payload)
+    )
+    db.commit()
+    return cursor.rowcount > 0
+
+
+def apply_event(db, event_type, event):
+    """Apply one event's order transition; returns [(order_id, status)] changed"""
+    transition = TRANSITIONS.get(event_type)
+    if transition is None:
+        return []
+    status, from_statuses = transition
+    session_id = event['data']['object']['id']
+
+    order = db.execute('SELECT id, status FROM orders WHERE stripe_session_id = ?', (session_id,)).fetchone()
+    if order is None:
+        log.warning('No order found for session %s', session_id)
+        return []
+    if order[1] not in from_statuses:
+        return []
+    db.execute('UPDATE orders SET status = ? WHERE id = ?', (status, order[0]))
+    return [(order[0], status)]
+
+
+class WebhookInbox:
+    """Background worker pool draining the stripe_events table"""
+
+    def __init__(self, pool, workers=WEBHOOK_WORKERS, batch_size=WEBHOOK_BATCH_SIZE,
+                 poll_seconds=WEBHOOK_POLL_SECONDS):
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._started_pid = None
+        self._listeners = []
+        self.processed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the worker threads once per process"""
+        if self.workers <= 0 or self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'webhook-inbox-{i}', daemon=True)
+                thread.start()
+        # Pick up anything left over from a previous process
+        self._wakeup.set()
+
+    def add_listener(self, callback):
+        """Call callback(order_id, status) after each committed order status change"""
+        self._listeners.append(callback)
+
+    def notify(self):
+        """Wake a worker after an event was stored"""
+        self.start()
+        self._wakeup.set()
+
+    def apply_now(self, event):
+        """Apply one event directly, bypassing the inbox (which could not store it)"""
+        db = self.pool.acquire()
+        try:
+            changes = apply_event(db, event['type'], event)
+            db.commit()
+        finally:
+            self.pool.release(db)
+        self._publish(changes)
+
+    def _publish(self, changes):
+        for order_id, status in changes:
+            log.info('Order %s marked as %s via webhook', order_id, status)
+            for callback in self._listeners:
+                try:
+                    callback(order_id, status)
+                except Exception:
+                    log.exception('Error in webhook inbox listener %r', callback)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            try:
+                while self.drain_batch() == self.batch_size:
+                    pass
+            except sqlite3.Error as e:
+                log.error('Webhook inbox error: %s', e)
+
+    def drain_batch(self):
+        """Process up to batch_size pending events in one transaction; returns the count"""
+        db = self.pool.acquire()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            rows = db.execute(
+                '''
+                SELECT id, type, payload, attempts FROM stripe_events
+                WHERE processed_at IS NULL
+                  AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP)
+                ORDER BY received_at, id
+                LIMIT ?
+                ''',
+                (self.batch_size,)
+            ).fetchall()
+
+            changes = []
+            for event_id, event_type, payload, attempts in rows:
+                db.execute('SAVEPOINT event')
+                try:
+                    changes.extend(apply_event(db, event_type, json.loads(payload)))
+                    db.execute(
+                        'UPDATE stripe_events SET processed_at = CURRENT_TIMESTAMP, attempts = attempts + 1 WHERE id = ?',
+                        (event_id,)
+                    )
+                    db.execute('RELEASE SAVEPOINT event')
+                    self.processed += 1
+                except (KeyError, TypeError, ValueError, sqlite3.Error) as e:
+                    db.execute('ROLLBACK TO SAVEPOINT event')
+                    db.execute('RELEASE SAVEPOINT event')
+                    give_up = attempts + 1 >= WEBHOOK_MAX_ATTEMPTS
+                    db.execute(
+                        '''
+                        UPDATE stripe_events
+                        SET attempts = attempts + 1, last_error = ?,
+                            processed_at = CASE WHEN ? THEN CURRENT_TIMESTAMP END,
+                            next_attempt_at = datetime('now', ?)
+                        WHERE id = ?
+                        ''',
+                        (str(e), give_up, f'+{2 ** (attempts + 1)} seconds', event_id)
+                    )
+                    self.failed += 1
+                    log.warning('Error processing webhook event %s: %s', event_id, e)
+            db.commit()
+        except sqlite3.Error:
+            if db.in_transaction:
+                db.rollback()
+            raise
+        finally:
+            self.pool.release(db)
+
+        self._publish(changes)
+        return len(rows)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'running': self._started_pid == os.getpid(),
+            'processed': self.processed,
+            'failed': self.failed,
+        }
+
+
+# Background workers that apply stored Stripe webhook events; order status
+# changes are pushed to open order status streams
+webhook_inbox = WebhookInbox(pool)
+webhook_inbox.add_listener(order_events.publish)
@@ -0,0 +1,41 @@
+"""
+Test setup: the app runs from src/ against a throwaway SQLite database.
+
+Settings are read from the environment when modules are first imported, so
+they are set here before anything from src/ is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC)
+
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='fondant-tests-'), 'test.db')
+os.environ.setdefault('STRIPE_SECRET_KEY', 'sk_test_dummy')
+os.environ.setdefault('STRIPE_MAX_NETWORK_RETRIES', '0')
+os.environ.setdefault('WEBHOOK_AUTOSTART', 'False')
+os.environ.setdefault('EMAIL_AUTOSTART', 'False')
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def db(app):
+    from db import get_db
+    with app.app_context():
+        yield get_db()
@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from cart_store import Cart, cart_store, session_items, unit_price_cents
+from catalog import catalog
+
+
+def test_add_merges_lines_with_the_same_key():
+    cart = Cart()
+    cart.add((1, 'Medium', 'Pink'), 2, 920)
+    cart.add((1, 'Medium', 'Pink'), 3, 920)
+    cart.add((1, 'Medium', 'Blue'), 1, 920)
+
+    assert cart.lines == {(1, 'Medium', 'Pink'): (5, 920), (1, 'Medium', 'Blue'): (1, 920)}
+    assert (cart.count, cart.subtotal_cents) == (6, 6 * 920)
+
+
+def test_totals_follow_updates_and_removes():
+    cart = Cart()
+    cart.add((1, '', ''), 2, 420)
+    cart.add((2, '', ''), 1, 320)
+
+    assert cart.set_quantity((1, '', ''), 5)
+    assert not cart.set_quantity((3, '', ''), 1)
+    cart.remove((2, '', ''))
+
+    assert cart.items() == [(1, '', '', 5)]
+    assert (cart.count, cart.subtotal_cents) == (5, 2100)
+
+
+def test_copy_does_not_change_the_original():
+    cart = Cart()
+    cart.add((1, '', ''), 1, 420)
+    changed = cart.copy()
+    changed.add((1, '', ''), 1, 420)
+
+    assert (cart.count, cart.subtotal_cents) == (1, 420)
+    assert (changed.count, changed.subtotal_cents) == (2, 840)
+
+
+def test_session_items_reads_old_and_compact_cookie_carts():
+    stored = [
+        [1, 'Medium', 'Pink', 2],
+        {'product_id': '2', 'quantity': '3'},
+        {'quantity': 1},
+        'garbage',
+    ]
+    assert session_items(stored) == [(1, 'Medium', 'Pink', 2), (2, '', '', 3)]
+
+
+def batch(client, *operations):
+    return client.post('/api/cart/batch', json={'operations': list(operations)})
+
+
+@pytest.fixture
+def cart_client(client):
+    assert batch(client).get_json()['cart_count'] == 0
+    return client
+
+
+def test_batch_merges_adds(cart_client):
+    data = batch(cart_client,
+                 {'op': 'add', 'product_id': 1, 'variant': 'Medium', 'quantity': 1},
+                 {'op': 'add', 'product_id': 1, 'variant': 'Medium', 'quantity': 2}).get_json()
+
+    unit_cents = unit_price_cents(catalog.get(1), 'Medium')
+    assert data['success']
+    assert [(line['product_id'], line['variant'], line['quantity']) for line in data['items']] == [(1, 'Medium', 3)]
+    assert data['subtotal_cents'] == 3 * unit_cents
+
+
+def test_batch_with_an_invalid_operation_changes_nothing(cart_client):
+    batch(cart_client, {'op': 'add', 'product_id': 1, 'quantity': 1})
+
+    response = batch(cart_client,
+                     {'op': 'add', 'product_id': 2, 'quantity': 4},
+                     {'op': 'update', 'product_id': 1, 'quantity': 3},
+                     {'op': 'update', 'product_id': 3, 'quantity': 1})
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': 'Item not in cart', 'index': 2}
+
+    data = batch(cart_client).get_json()
+    assert [(line['product_id'], line['quantity']) for line in data['items']] == [(1, 1)]
+    assert cart_client.get('/cart/count').get_json() == {'count': 1}
+
+
+def test_batch_rejects_unknown_products_and_operations(cart_client):
+    for op in ({'op': 'add', 'product_id': 10 ** 6}, {'op': 'empty', 'product_id': 1}, {'op': 'add'}, 'add'):
+        response = batch(cart_client, op)
+        assert response.status_code == 400
+        assert response.get_json()['index'] == 0
+    assert cart_client.get('/cart/count').get_json() == {'count': 0}
+
+
+def test_cart_is_kept_in_the_cookie_without_a_cart_store(cart_client, monkeypatch):
+    def unavailable(*args):
+        raise sqlite3.OperationalError('no such table: carts')
+
+    monkeypatch.setattr(cart_store, 'load', unavailable)
+    monkeypatch.setattr(cart_store, 'save', unavailable)
+
+    batch(cart_client, {'op': 'add', 'product_id': 1, 'variant': 'Medium', 'color': 'Pink', 'quantity': 2})
+    with cart_client.session_transaction() as session:
+        assert session_items(session['cart']) == [(1, 'Medium', 'Pink', 2)]
+        assert 'cart_id' not in session
+    assert cart_client.get('/cart/count').get_json() == {'count': 2}
+
+    # Moved to the store by the next save once it is back
+    monkeypatch.undo()
+    batch(cart_client, {'op': 'add', 'product_id': 2, 'quantity': 1})
+    with cart_client.session_transaction() as session:
+        assert 'cart' not in session and session['cart_id']
+    assert cart_client.get('/cart/count').get_json() == {'count': 3}
@@ -0,0 +1,41 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from catalog import CATALOG_FILE, ProductCatalog
+
+
+@pytest.fixture
+def catalog_file(tmp_path):
+    path = tmp_path / 'products.json'
+    shutil.copy(CATALOG_FILE, path)
+    return path
+
+
+def add_product(path, title):
+    products = json.loads(path.read_text())
+    products.append({'title': title, 'price': '1.00'})
+    path.write_text(json.dumps(products))
+
+
+def test_watcher_is_restarted_after_fork(catalog_file):
+    pytest.importorskip('watchdog')
+    catalog = ProductCatalog(str(catalog_file), artifact_path=None)
+    assert catalog.start_watching(debounce=0.01)
+    try:
+        count = len(catalog.snapshot())
+        inherited = catalog._observer
+
+        # As in a worker forked from the process that started the watcher
+        catalog._observer_pid = os.getppid()
+        assert not catalog.stats()['watching']
+        add_product(catalog_file, 'Forked topper')
+
+        assert len(catalog.snapshot()) == count + 1
+        assert catalog._observer is not inherited
+        assert catalog.stats()['watching']
+    finally:
+        inherited.stop()
+        catalog.stop_watching()
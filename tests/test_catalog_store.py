@@ -0,0 +1,20 @@
+from catalog_store import SQLiteCatalogStore
+
+
+def product(product_id, title, price_cents=420):
+    return {'id': product_id, 'title': title, 'price': f'{price_cents / 100:.2f}', 'price_cents': price_cents}
+
+
+def test_reimport_replaces_search_entries(tmp_path):
+    store = SQLiteCatalogStore(str(tmp_path / 'catalog.db'))
+    store.ensure_schema()
+    store.import_products([product(1, 'Bear topper'), product(2, 'Unicorn topper')])
+    version = store.version()
+
+    store.import_products([product(1, 'Bunny topper', 520)])
+
+    assert store.search('bear') == []
+    assert [p['id'] for p in store.search('bunny')] == [1]
+    assert store.get(1)['price_cents'] == 520
+    assert [p['title'] for p in store.load_products()] == ['Bunny topper', 'Unicorn topper']
+    assert store.version() > version
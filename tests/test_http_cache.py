@@ -0,0 +1,33 @@
+from reviews import reviews_version
+
+
+def etag(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def test_review_moderation_only_invalidates_pages_showing_reviews(client, monkeypatch):
+    paths = ['/qa', '/products', '/product/1', '/reviews']
+    before = {path: etag(client, path) for path in paths}
+
+    # As if a review was just moderated (without waiting for the version TTL)
+    monkeypatch.setattr(reviews_version, 'ttl', float('inf'))
+    monkeypatch.setattr(reviews_version, '_revision', reviews_version._revision + 1)
+    after = {path: etag(client, path) for path in paths}
+
+    assert after['/qa'] == before['/qa']
+    assert after['/products'] == before['/products']
+    assert after['/product/1'] != before['/product/1']
+    assert after['/reviews'] != before['/reviews']
+
+
+def test_matching_etag_is_answered_with_304(client):
+    tag = etag(client, '/product/1')
+    assert client.get('/product/1', headers={'If-None-Match': tag}).status_code == 304
+
+
+def test_if_modified_since_alone_is_not_a_validator(client):
+    response = client.get('/reviews', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+    assert 'Last-Modified' not in response.headers
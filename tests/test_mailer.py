@@ -0,0 +1,138 @@
+import smtplib
+import sqlite3
+
+import pytest
+
+import mailer
+from db import pool
+from mailer import MailSender, enqueue_email
+
+
+class FakeSMTP:
+    """Records sent messages; fails while `failures` is positive"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, msg):
+        if self.failures:
+            self.failures -= 1
+            raise smtplib.SMTPRecipientsRefused({msg['To']: (550, b'mailbox unavailable')})
+        self.sent.append(msg)
+
+    def noop(self):
+        return (250, b'OK')
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def outbox(db):
+    db.execute('DELETE FROM email_outbox')
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    server = FakeSMTP()
+    monkeypatch.setattr(mailer, 'open_smtp', lambda: server)
+    return server
+
+
+def row(db, email_id):
+    return db.execute('SELECT * FROM email_outbox WHERE id = ?', (email_id,)).fetchone()
+
+
+def make_due(db, email_id):
+    db.execute("UPDATE email_outbox SET next_attempt_at = datetime('now', '-1 seconds') WHERE id = ?", (email_id,))
+    db.commit()
+
+
+def test_enqueue_and_send_batch(outbox, smtp):
+    ids = [enqueue_email(outbox, 'shop@example.com', 'shop@example.com', f'Contact Form: {n}', 'Hi')
+           for n in range(3)]
+    sender = MailSender(pool, batch_size=2)
+
+    assert sender.send_batch() == 2
+    assert sender.send_batch() == 1
+    assert sender.send_batch() == 0
+
+    assert [msg['Subject'] for msg in smtp.sent] == ['Contact Form: 0', 'Contact Form: 1', 'Contact Form: 2']
+    assert all(row(outbox, email_id)['sent_at'] for email_id in ids)
+    # One connection for the whole outbox
+    assert sender.connections == 1
+    assert sender.stats()['sent'] == 3
+
+
+def test_failed_message_is_retried_with_backoff(outbox, smtp):
+    email_id = enqueue_email(outbox, 'shop@example.com', 'shop@example.com', 'Contact Form: retry', 'Hi')
+    smtp.failures = 1
+    sender = MailSender(pool)
+
+    assert sender.send_batch() == 1
+    failed = row(outbox, email_id)
+    assert failed['sent_at'] is None and failed['failed_at'] is None
+    assert failed['attempts'] == 1
+    assert 'mailbox unavailable' in failed['last_error']
+    # Not due again until the backoff has passed
+    assert sender.send_batch() == 0
+
+    make_due(outbox, email_id)
+    assert sender.send_batch() == 1
+    assert row(outbox, email_id)['sent_at'] is not None
+    assert row(outbox, email_id)['attempts'] == 2
+    assert (sender.sent, sender.failed) == (1, 1)
+
+
+def test_message_is_parked_after_max_attempts(outbox, smtp, monkeypatch):
+    monkeypatch.setattr(mailer, 'EMAIL_MAX_ATTEMPTS', 2)
+    email_id = enqueue_email(outbox, 'shop@example.com', 'shop@example.com', 'Contact Form: bounce', 'Hi')
+    smtp.failures = 5
+    sender = MailSender(pool)
+
+    sender.send_batch()
+    make_due(outbox, email_id)
+    sender.send_batch()
+
+    parked = row(outbox, email_id)
+    assert parked['attempts'] == 2
+    assert parked['failed_at'] is not None and parked['sent_at'] is None
+    make_due(outbox, email_id)
+    assert sender.send_batch() == 0
+    assert smtp.sent == []
+
+
+@pytest.fixture
+def contact_form(client, monkeypatch):
+    import views.content
+
+    monkeypatch.setenv('EMAIL_USER', 'shop@example.com')
+    monkeypatch.setattr(views.content.mail_sender, 'notify', lambda: None)
+    return lambda subject: client.post('/contact', data={
+        'name': 'Buyer', 'email': 'buyer@example.com', 'subject': subject, 'message': 'Hello'
+    })
+
+
+def test_contact_form_queues_email(outbox, contact_form):
+    assert contact_form('Queued').status_code == 302
+    queued = outbox.execute('SELECT recipient, subject, sent_at FROM email_outbox').fetchall()
+    assert [tuple(r) for r in queued] == [('shop@example.com', 'Contact Form: Queued', None)]
+
+
+def test_contact_form_sends_directly_without_outbox(outbox, contact_form, monkeypatch):
+    import views.content
+
+    def read_only(*args):
+        raise sqlite3.OperationalError('attempt to write a readonly database')
+
+    sent = []
+    monkeypatch.setattr(views.content, 'enqueue_email', read_only)
+    monkeypatch.setattr(views.content, 'send_email', lambda *args: sent.append(args))
+
+    assert contact_form('Direct').status_code == 302
+    assert [(sender, recipient, subject) for sender, recipient, subject, _ in sent] == [
+        ('shop@example.com', 'shop@example.com', 'Contact Form: Direct')
+    ]
@@ -0,0 +1,125 @@
+import pytest
+
+from catalog import catalog
+from orders import create_order, order_items
+from stripe_prices import product_key
+
+
+def item(product_id, unit_cents, quantity, name='Topper', variant='', color=''):
+    return {'product_id': product_id, 'product_name': name, 'variant': variant,
+            'color': color, 'unit_cents': unit_cents, 'quantity': quantity}
+
+
+CUSTOMER = {'uid': 'firebase-uid', 'email': 'buyer@example.com', 'name': 'Buyer'}
+
+
+def test_create_order_totals_in_cents(db):
+    # 0.1 + 0.2 style float drift must not reach the stored total
+    items = [item(1, 10, 3), item(2, 20, 1, variant='Medium'), item(None, 1999, 2)]
+    order_id = create_order(db, 'cs_test_cents', CUSTOMER, 'Toppers', items)
+
+    order = db.execute('SELECT total_cents, product_price, customer_uid FROM orders WHERE id = ?',
+                       (order_id,)).fetchone()
+    assert order['total_cents'] == 10 * 3 + 20 + 1999 * 2
+    assert order['product_price'] == 40.48
+    assert order['customer_uid'] == 'firebase-uid'
+
+    rows = order_items(db, order_id)
+    assert [(r['product_id'], r['variant'], r['unit_cents'], r['quantity'], r['line_cents']) for r in rows] == [
+        (1, '', 10, 3, 30),
+        (2, 'Medium', 20, 1, 20),
+        (None, '', 1999, 2, 3998),
+    ]
+
+
+def test_create_order_rolls_back_on_bad_item(db):
+    before = db.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    with pytest.raises(KeyError):
+        create_order(db, 'cs_test_bad', CUSTOMER, 'Broken', [item(1, 100, 1), {'product_id': 2}])
+    assert db.execute('SELECT COUNT(*) FROM orders').fetchone()[0] == before
+
+
+class FakeSession:
+    id = 'cs_test_session'
+    url = 'https://checkout.stripe.test/pay'
+
+
+@pytest.fixture
+def checkout_calls(monkeypatch):
+    """Capture Stripe Checkout sessions and cached price lookups instead of calling Stripe"""
+    import views.checkout
+    from stripe_prices import stripe_prices
+
+    calls = {'sessions': [], 'prices': []}
+
+    class Stripe:
+        class checkout:
+            class Session:
+                @staticmethod
+                def create(**kwargs):
+                    calls['sessions'].append(kwargs)
+                    return FakeSession()
+
+    def price_id(product_key, variant, unit_amount, name, currency='usd'):
+        calls['prices'].append((str(product_key), variant, unit_amount))
+        return f'price_{product_key}_{variant}_{unit_amount}'
+
+    monkeypatch.setattr(views.checkout, 'stripe_api', lambda: Stripe)
+    monkeypatch.setattr(stripe_prices, 'price_id', price_id)
+    return calls
+
+
+def test_price_cache_key_follows_the_product_not_its_position():
+    products = catalog.products()
+    same_price = next(p for p in products[1:] if p['price_cents'] == products[0]['price_cents']
+                      and p['title'] != products[0]['title'])
+    assert product_key(products[0]) != product_key(same_price)
+    # A product moved to another position (JSON ids are list indexes) keeps its key
+    assert product_key({**same_price, 'id': products[0]['id']}) == product_key(same_price)
+
+
+def checkout(client, **data):
+    return client.post('/create-checkout-session', json={'firebase_user': {'uid': 'firebase-uid'}, **data})
+
+
+def test_checkout_prices_product_from_catalog(client, db, checkout_calls):
+    product = catalog.get(1)
+    response = checkout(client, product_id=1, variant='Medium', quantity=2, name='Cheap', price='0.01')
+    assert response.status_code == 200
+
+    medium = next(v for v in product['variants'] if v['name'] == 'Medium')
+    unit_cents = product['price_cents'] + int(medium['price_modifier']) * 100
+    key = product_key(product)
+    assert checkout_calls['prices'] == [(key, 'Medium', unit_cents)]
+    assert checkout_calls['sessions'][0]['line_items'] == [
+        {'price': f'price_{key}_Medium_{unit_cents}', 'quantity': 2}
+    ]
+
+    order = db.execute('SELECT id, product_name, total_cents FROM orders WHERE id = ?',
+                       (response.get_json()['order_id'],)).fetchone()
+    assert order['product_name'] == product['title']
+    assert order['total_cents'] == unit_cents * 2
+
+
+def test_checkout_unknown_variant_uses_base_price(client, checkout_calls):
+    response = checkout(client, product_id=1, variant='Gold Plated')
+    assert response.status_code == 200
+    product = catalog.get(1)
+    assert checkout_calls['prices'] == [(product_key(product), '', product['price_cents'])]
+
+
+def test_checkout_rejects_unknown_product(client, checkout_calls):
+    response = checkout(client, product_id=10 ** 6, name='Anything', price='0.01')
+    assert response.status_code == 404
+    assert checkout_calls['sessions'] == []
+    assert checkout_calls['prices'] == []
+
+
+def test_checkout_adhoc_product_is_not_cached(client, checkout_calls):
+    response = checkout(client, name='Custom cake topper', price='12.34')
+    assert response.status_code == 200
+    assert checkout_calls['prices'] == []
+    assert checkout_calls['sessions'][0]['line_items'] == [{
+        'price_data': {'currency': 'usd', 'product_data': {'name': 'Custom cake topper'}, 'unit_amount': 1234},
+        'quantity': 1,
+    }]
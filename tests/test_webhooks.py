@@ -0,0 +1,47 @@
+import json
+import sqlite3
+
+import views.webhooks
+from orders import create_order
+
+
+def deliver(client, body):
+    return client.post('/webhook', data=body, content_type='application/json')
+
+
+def completed(session_id):
+    return json.dumps({'id': f'evt_{session_id}', 'type': 'checkout.session.completed',
+                       'data': {'object': {'id': session_id}}})
+
+
+def test_malformed_payloads_are_rejected(client):
+    for body in (b'not json', b'[1, 2]', b'"text"', b'{"id": "evt_no_type"}', b'{"type": "x", "note": "\xff"}'):
+        assert deliver(client, body).status_code == 400
+
+
+def test_event_is_stored_once(client, db, monkeypatch):
+    monkeypatch.setattr(views.webhooks.webhook_inbox, 'notify', lambda: None)
+    body = completed('cs_test_stored')
+
+    assert deliver(client, body).get_json() == {'status': 'success', 'duplicate': False}
+    assert deliver(client, body).get_json() == {'status': 'success', 'duplicate': True}
+    row = db.execute("SELECT type, processed_at FROM stripe_events WHERE id = 'evt_cs_test_stored'").fetchone()
+    assert tuple(row) == ('checkout.session.completed', None)
+
+
+def test_event_is_applied_inline_without_a_writable_inbox(client, db, monkeypatch):
+    order_id = create_order(db, 'cs_test_inline', {'uid': 'u'}, 'Topper',
+                            [{'product_id': 1, 'product_name': 'Topper', 'variant': '', 'color': '',
+                              'unit_cents': 420, 'quantity': 1}])
+
+    def read_only(*args):
+        raise sqlite3.OperationalError('attempt to write a readonly database')
+
+    monkeypatch.setattr(views.webhooks, 'store_event', read_only)
+
+    response = deliver(client, completed('cs_test_inline'))
+    assert response.status_code == 200
+    assert db.execute('SELECT status FROM orders WHERE id = ?', (order_id,)).fetchone()[0] == 'completed'
+
+    # Events that cannot be applied are still acknowledged
+    assert deliver(client, json.dumps({'type': 'checkout.session.completed'})).status_code == 200